@@ -1,38 +1,37 @@
 import time
-import requests
-from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
 import gspread
 from google.oauth2.service_account import Credentials
+from checkpoint import RESUME_RUN, RunCheckpoint
+from detail_priority import DetailPrioritizer
+from frame_filters import drop_matching, extract_emails, keep_unmatched, keyword_matches
+from job_index import JobIndex
+from job_parser import parse_search_cards
+from posting_archive import archive_postings
+from search_cache import SearchCache
+from search_planner import SearchPlanner
+from seen_jobs import ONLY_NEW_POSTINGS, SeenJobsStore
+from sheet_sink import DatedAppendSink, SheetSink
+from linkedin_fetch import crawl_pipelined, fetch_job_details
+from rate_control import RATE_CONTROLLER
+from run_budget import PIPELINED_CRAWL, RunBudget, run_max_duration, run_start_time
+from skill_matcher import SkillMatcher
 
 # ==========================================
 # --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
 # ==========================================
-START_TIME = time.time()
+START_TIME = run_start_time()  # Start of this script's slice of the batch when routed by the orchestrator
 # 5.5 hours = 5.5 * 60 * 60 = 19,800 seconds
-MAX_DURATION_SECONDS = 21000 
+MAX_DURATION_SECONDS = run_max_duration(21000)
 
 def has_time_expired():
     """Returns True if the script has been running for more than 5.5 hours."""
     elapsed = time.time() - START_TIME
     return elapsed >= MAX_DURATION_SECONDS
 
-# ==========================================
-# --- HELPER FUNCTIONS ---
-# ==========================================
-def extract_emails(text):
-    """Extracts unique email addresses from a text block using regex."""
-    if not text or text == "Not Found":
-        return ""
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    found_emails = re.findall(email_pattern, text)
-    # Deduplicate and format as a comma-separated string
-    return ", ".join(sorted(list(set(found_emails))))
-
 # ==========================================
 # --- CONFIGURATION & SEARCH CRITERIA ---
 # ==========================================
@@ -47,6 +46,10 @@ countries = [
     "Bosnia and Herzegovina", "Albania", "Ukraine", "Russia", "South Africa", "Mauritius", "Greenland",
 ]
 
+# LinkedIn guest search endpoint and how many 25-result pages are read per search
+SEARCH_URL_TEMPLATE = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location={country}&f_TPR=r86400&start={start}"
+PAGES_PER_SEARCH = 3
+
 excluded_countries = ["United States", "USA", "États-Unis", "India", "Pakistan", "Philippines", "Israel", "Vietnam"]
 
 keywords_for_scraping = [ # Keywords used to search on LinkedIn
@@ -60,6 +63,11 @@ linkedin_worldwide_filter_keywords = [
     "n8n", "zapier", "make.com", "integromat"
 ]
 
+# Search-card title words that make a job worth fetching early in Step 2
+detail_priority_title_keywords = linkedin_worldwide_filter_keywords + [
+    "automation", "automatisation", "workflow", "no-code", "no code", "low-code", "low code",
+]
+
 # ==========================================
 # --- SKILL CATEGORIES & DICTIONARIES ---
 # ==========================================
@@ -171,121 +179,187 @@ for tag, skills in skill_categories.items():
 # Ensure unique skills in the consolidated list
 count_skills_keywords = list(set(count_skills_keywords))
 
+# Compiled once and reused for every description in the Count Skills step
+skill_matcher = SkillMatcher(skill_categories)
+
 
 # ==========================================
 # --- STEP 1 — SCRAPE JOB LINKS ---
 # ==========================================
-links = []
-api_url_job = []
-break_step1 = False
-
-print("🚀 Starting Step 1: Scraping job links...")
-for country in countries:
-    if break_step1:
-        break
-    for keyword in keywords_for_scraping:
-        if break_step1:
+search_cache = SearchCache()
+search_planner = SearchPlanner("app") # Past yield per (country, keyword, page), best pages are searched first
+# Past "Linkedin Worldwide" hit rate per searched keyword, used to fetch the most promising job pages first
+detail_prioritizer = DetailPrioritizer("app", linkedin_worldwide_filter_keywords, detail_priority_title_keywords)
+checkpoint = RunCheckpoint("app")
+resumed = checkpoint.load() if RESUME_RUN else None
+
+if resumed:
+    job_index = resumed["job_index"]
+    search_queries = resumed["pending_queries"]
+    details_by_link = resumed["details"]
+    print(f"♻️ Resuming from checkpoint: {len(search_queries)} search pages and {len(resumed['pending_links'])} job links left.")
+else:
+    job_index = JobIndex() # Dedups search hits on the numeric job ID and keeps every keyword that found them
+    search_queries = search_planner.plan([
+        (country, keyword, i)
+        for country in countries
+        for keyword in keywords_for_scraping
+        for i in range(0, PAGES_PER_SEARCH)
+    ])
+    details_by_link = {}
+pending_queries = search_queries # Search pages not crawled yet, saved in checkpoints
+link_urls = None # Job links Step 2 should visit, known once Step 1 is done (None: every indexed job)
+seen_jobs = SeenJobsStore("app")
+budget = RunBudget(START_TIME, MAX_DURATION_SECONDS) # Keeps time for job details and the Sheets write
+
+def needs_details(link):
+    """True when Step 2 still has to fetch this job (respecting --only-new)."""
+    if link in details_by_link:
+        return False
+    return not ONLY_NEW_POSTINGS or job_index.job_id_for(link) not in seen_jobs
+
+def fetch_search_page(query):
+    """Downloads one search page (served from the shared on-disk cache when another scraper fetched it recently)."""
+    country, keyword, i = query
+    url = SEARCH_URL_TEMPLATE.format(keyword=keyword, country=country, start=i*25)
+    headers = {"User-Agent": "Mozilla/5.0"}
+    try:
+        return search_cache.fetch(url, headers=headers)
+    except Exception as e:
+        print(f"Error fetching search page: {e}")
+        return None
+
+def collect_job_links(query, page_html, remaining_queries):
+    """Adds a search page's jobs to the index and returns the newly found job links that need details."""
+    global pending_queries
+    country, keyword, i = query
+    new_links = []
+
+    if page_html is not None:
+        found_job_ids = []
+        for card in parse_search_cards(page_html):
+            if job_index.add(card.url, keyword, card):
+                new_links.append(job_index.get(card.url)["url"])
+            found_job_ids.append(job_index.job_id_for(card.url))
+        search_planner.record_search(query, found_job_ids, len(new_links))
+
+    pending_queries = remaining_queries
+    checkpoint.save_periodically(pending_queries, job_index, details_by_link)
+    # Postings whose card already shows an excluded country never reach the detail queue
+    new_links, _ = keep_unmatched(new_links, job_index.card_locations(new_links), excluded_countries)
+    return [link for link in new_links if needs_details(link)]
+
+def detail_priority(link):
+    """Step 2 fetch order: jobs found by historically productive keywords, or with promising card titles, come first."""
+    card = job_index.card_for(link)
+    return detail_prioritizer.score(job_index.keywords_for(link), card.title if card else None)
+
+def record_job_details(link, details):
+    """Keeps each parsed page and checkpoints progress every few minutes."""
+    details_by_link[link] = details
+    seen_jobs.add(job_index.job_id_for(link))
+    budget.record_detail()
+    checkpoint.save_periodically(pending_queries, job_index, details_by_link, link_urls)
+
+if PIPELINED_CRAWL:
+    print("🚀 Starting Steps 1 and 2 together: job details are fetched while search pages are crawled...")
+    crawl_pipelined(
+        search_queries,
+        fetch_search_page,
+        collect_job_links,
+        should_stop_search=budget.search_expired,
+        should_stop=budget.details_expired,
+        on_result=record_job_details,
+        priority=detail_priority,
+    )
+else:
+    print("🚀 Starting Step 1: Scraping job links...")
+    for position, query in enumerate(search_queries):
+
+        # --- Safetime Check --- (stop early enough to fetch every job found so far)
+        if budget.search_expired(len(job_index) - len(details_by_link)):
+            pending_queries = search_queries[position:]
             break
-        for i in range(0, 3):  # Increase range for more pages
-            
-            # --- Safetime Check ---
-            if has_time_expired():
-                print("⚠️ Approaching 5.5 hours limit during Step 1! Breaking out of link collection early to save data.")
-                break_step1 = True
-                break
-
-            url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location={country}&f_TPR=r86400&start={i*25}"
-            headers = {"User-Agent": "Mozilla/5.0"}
-
-            time.sleep(1)
-            try:
-                response = requests.get(url, headers=headers)
-                soup = BeautifulSoup(response.text, "html.parser")
-                job_links = soup.find_all("a", class_="base-card__full-link")
-
-                for job in job_links:
-                    job_url = job.get("href")
-                    if job_url and job_url not in [link[0] for link in links]: # Check if URL is already present
-                        links.append((job_url, keyword))
-                        match = re.search(r'-([0-9]+)\?', job_url)
-                        if match:
-                            job_id = match.group(1)
-                            api_link = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-                            api_url_job.append(api_link)
-            except Exception as e:
-                print(f"Error fetching search page: {e}")
 
+        collect_job_links(query, fetch_search_page(query), search_queries[position + 1:])
+
+if pending_queries:
+    print("⚠️ Step 1 time budget reached! Keeping the rest of the run for job details and the Sheets write.")
+
+links = job_index.links()
+api_url_job = job_index.api_urls()
 print(f"Total unique job links found: {len(links)}")
+print(search_cache.summary())
+
+# --- Skip excluded countries before Step 2, from the location on each job's search card ---
+links, skipped_by_card = keep_unmatched(links, job_index.card_locations(link for link, _ in links), excluded_countries)
+print(f"🌍 {skipped_by_card} postings in excluded countries dropped from their search cards ({skipped_by_card} detail fetches saved).")
+
+# --- Only-new mode: skip postings an earlier run already scraped ---
+if ONLY_NEW_POSTINGS:
+    links = [(link, keyword) for link, keyword in links if link in details_by_link or job_index.job_id_for(link) not in seen_jobs]
+    print(f"Only-new mode: {len(links)} postings were not scraped by an earlier run.")
 
 
 # ==========================================
 # --- STEP 2 — SCRAPE JOB DETAILS ---
 # ==========================================
 all_job_data = [] # Stores all scraped job details before filtering
-headers = {"User-Agent": "Mozilla/5.0"}
+link_urls = [link for link, _ in links]
 
 print("🚀 Starting Step 2: Scraping specific job profiles...")
-for link, searched_keyword in links:
-    
-    # --- Safetime Check ---
-    if has_time_expired():
-        print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Activating fallback script to process existing ({len(all_job_data)}) records.")
-        break
-
-    try:
-        time.sleep(1)
-        response = requests.get(link, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title_tag = soup.find('h1', class_='top-card-layout__title') or soup.find('h2', class_='top-card-layout__title')
-        title = title_tag.text.strip() if title_tag else "Not Found"
-
-        company_tag = soup.find('a', class_='topcard__org-name-link')
-        company = company_tag.text.strip() if company_tag else "Not Found"
-
-        country_tag = soup.find('span', class_='topcard__flavor--bullet')
-        country = country_tag.text.strip() if country_tag else "Not Found"
+# Pages are fetched concurrently, most promising first; workers stop picking up new links once the Sheets reserve starts.
+# In pipelined mode only links left over from a resumed checkpoint are still missing here.
+fetch_job_details(
+    [link for link in link_urls if link not in details_by_link],
+    should_stop=budget.details_expired,
+    on_result=record_job_details,
+    priority=detail_priority,
+)
+print(RATE_CONTROLLER.summary())
+print(budget.summary())
+
+# --- Safetime Check ---
+if budget.details_expired():
+    print(f"⚠️ Reached the Step 2 time budget. Activating fallback script to process existing ({len(details_by_link)}) records.")
+
+# Keep whatever is left (search pages, job links) for the next --resume run
+checkpoint.finish(pending_queries, job_index, details_by_link, link_urls)
 
-        desc_tag = soup.find('div', class_='description__text--rich')
-        desc = desc_tag.text.strip() if desc_tag else "Not Found"
-
-        # Skip excluded countries
-        if any(excluded.lower() in country.lower() for excluded in excluded_countries):
-            continue
-
-        all_job_data.append({
-            "Date": today_date_str,
-            "title": title,
-            "company": company,
-            "country": country,
-            "link": link,
-            "searched_keyword": searched_keyword,
-            "description": desc # Keep description for skill counting and email parsing later
-        })
+for link, searched_keyword in links:
+    details = details_by_link.get(link)
+    if details is None:
+        continue
 
-    except Exception as e:
-        print(f"Error scraping details for {link}: {e}")
+    all_job_data.append({
+        "Date": today_date_str,
+        "title": details.title,
+        "company": details.company,
+        "country": details.country,
+        "link": link,
+        "searched_keyword": searched_keyword,
+        "description": details.description # Keep description for skill counting and email parsing later
+    })
 
 
 # ==========================================
 # --- STEP 3 TO 6 — PROCESS & SAVE DATA ---
 # ==========================================
-if not all_job_data:
+# Skip excluded countries (one vectorized pass over the whole run)
+df_all_jobs = drop_matching(pd.DataFrame(all_job_data), "country", excluded_countries)
+if df_all_jobs.empty:
     print("❌ No data was parsed during this execution window. Google Sheets will remain unchanged.")
 else:
     # --- Step 3 — Create DataFrame from all scraped data ---
-    df_all_jobs = pd.DataFrame(all_job_data)
     df_all_jobs = df_all_jobs.drop_duplicates(subset=['link']).reset_index(drop=True)
+    # Keep every raw record (descriptions included) in the local columnar archive
+    archive_postings(df_all_jobs, "app", today_date_str)
     print(f"Total unique jobs scraped (after initial deduplication): {len(df_all_jobs)}")
 
     # --- Step 4 — Process for "Linkedin Worldwide" sheet ---
-    def check_worldwide_keywords(description):
-        found_world_keywords = [k for k in linkedin_worldwide_filter_keywords if re.search(r'\b' + re.escape(k) + r'\b', description, flags=re.IGNORECASE)]
-        return ", ".join(found_world_keywords) if found_world_keywords else ""
-
-    # Extract emails & filter keywords from description
-    df_all_jobs['Email'] = df_all_jobs['description'].apply(extract_emails)
-    df_all_jobs['found_linkedin_worldwide_keywords'] = df_all_jobs['description'].apply(check_worldwide_keywords)
+    # Extract emails & filter keywords from description, column-wise
+    df_all_jobs['Email'] = extract_emails(df_all_jobs['description'])
+    df_all_jobs['found_linkedin_worldwide_keywords'] = keyword_matches(df_all_jobs['description'], linkedin_worldwide_filter_keywords)
     
     filtered_worldwide_df = df_all_jobs[df_all_jobs['found_linkedin_worldwide_keywords'] != ""].copy()
 
@@ -295,16 +369,18 @@ else:
     ]].rename(columns={"found_linkedin_worldwide_keywords": "Found Keywords"})
 
     print(f"Jobs for 'Linkedin Worldwide' sheet (unique and filtered): {len(filtered_worldwide_df)}")
+    search_planner.record_matches(job_index.job_id_for(link) for link in filtered_worldwide_df['link'])
+    detail_prioritizer.record_results(
+        {link: job_index.keywords_for(link) for link in df_all_jobs['link']}, filtered_worldwide_df['link']
+    )
 
     # --- Step 5 — Process for "Count Skills" sheet ---
     skill_counts = {skill: 0 for skill in count_skills_keywords}
 
-    for index, row in df_all_jobs.iterrows():
-        description = row['description']
-        for skill in count_skills_keywords:
-            # Use regex for whole word matching
-            if re.search(r'\b' + re.escape(skill) + r'\b', description, flags=re.IGNORECASE):
-                skill_counts[skill] += 1
+    # One whole-word scan per description finds every skill it mentions
+    for description in df_all_jobs['description']:
+        for skill in skill_matcher.find_skills(description):
+            skill_counts[skill] += 1
 
     # Convert skill counts to a DataFrame
     df_skill_counts_list = []
@@ -334,17 +410,9 @@ else:
         sheet_worldwide = client.open_by_url(SPREADSHEET_URL).add_worksheet(title=WORKSHEET_NAME_WORLDWIDE, rows="1000", cols="20")
 
     print(f"\nUpdating '{WORKSHEET_NAME_WORLDWIDE}' sheet...")
-    sheet_worldwide.clear() # Clear existing data
-    
-    # Avoid gspread updates with completely empty structures
-    if not filtered_worldwide_df.empty:
-        sheet_worldwide.update(
-            [filtered_worldwide_df.columns.values.tolist()] +
-            filtered_worldwide_df.values.tolist()
-        )
-    else:
-        sheet_worldwide.update([["Date", "title", "company", "country", "link", "Email", "searched_keyword", "Found Keywords"]])
-    print(f"✅ Data successfully updated in '{WORKSHEET_NAME_WORLDWIDE}'!")
+    # Only the rows that changed are sent, keyed on the job link; the tab is never cleared
+    sync = SheetSink(sheet_worldwide, "link").write(filtered_worldwide_df)
+    print(f"✅ Data successfully updated in {sync.summary(WORKSHEET_NAME_WORLDWIDE)}")
 
     # --- Update "Count Skills" Sheet ---
     WORKSHEET_NAME_COUNT_SKILLS = 'Count Skills'
@@ -355,19 +423,17 @@ else:
 
     print(f"\nUpdating '{WORKSHEET_NAME_COUNT_SKILLS}' sheet...")
 
-    # Get existing data from the sheet to append
-    existing_data = sheet_count_skills.get_all_values()
-    if existing_data:
-        # Check if headers match, if not, update headers
-        if existing_data[0] != df_skill_counts.columns.tolist():
-            sheet_count_skills.clear()
-            sheet_count_skills.update([df_skill_counts.columns.tolist()])
+    # Only the header row and the last row's Date are read, so a re-run the same day does not duplicate today's rows
+    appended_rows = DatedAppendSink(sheet_count_skills, "Date").write(df_skill_counts)
+    if appended_rows:
+        print(f"✅ Data successfully appended to '{WORKSHEET_NAME_COUNT_SKILLS}'!")
     else:
-        # Sheet is empty, add headers first
-        sheet_count_skills.update([df_skill_counts.columns.tolist()])
+        print(f"ℹ️ Counts for {today_date_str} were already appended to '{WORKSHEET_NAME_COUNT_SKILLS}', nothing to add.")
 
-    # Append new data securely
-    sheet_count_skills.append_rows(df_skill_counts.values.tolist(), value_input_option='RAW', insert_data_option='INSERT_ROWS')
-    print(f"✅ Data successfully appended to '{WORKSHEET_NAME_COUNT_SKILLS}'!")
+# Remember what this run scraped so --only-new runs can skip it
+seen_jobs.commit()
+# Fold this run's per-query yield into the history that orders the next run's searches
+search_planner.save()
+detail_prioritizer.save()
 
 print(f"🏁 Execution finished gracefully. Total time elapsed: {round((time.time() - START_TIME) / 60, 2)} minutes.")
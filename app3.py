@@ -1,21 +1,40 @@
-import time
-import requests
-from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
 import gspread
 from google.oauth2.service_account import Credentials
+from frame_filters import drop_matching, keep_unmatched
+from job_index import JobIndex
+from job_parser import parse_job_page, parse_search_cards
+from linkedin_fetch import prefetched_page
+from posting_archive import archive_postings
+import rate_control
+from run_budget import RunBudget, run_max_duration, run_start_time
+from search_cache import SearchCache
+from sheet_sink import SheetSink
 import json
 import os
+import sys
 
+# Pass --card-only to build records from the search cards, fetching a job page only when its card lacks a field
+CARD_ONLY = "--card-only" in sys.argv
+
+# ==========================================
+# --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
+# ==========================================
+START_TIME = run_start_time()  # Start of this script's slice of the batch when routed by the orchestrator
+MAX_DURATION_SECONDS = run_max_duration(21000)
+budget = RunBudget(START_TIME, MAX_DURATION_SECONDS) # Keeps time for job details and the Sheets write
 
 yesterday = datetime.now() - timedelta(days=1)
 date_str = yesterday.strftime('%Y-%m-%d') # e.g. '2025-10-18'
 
 # Step 0 — Setup
+# LinkedIn guest search endpoint and how many 25-result pages are read per search
+SEARCH_URL_TEMPLATE = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location=Rabat%2C%20Rabat-Sal%C3%A9-K%C3%A9nitra%2C%20Morocco&geoId=107116391&f_TPR=r86400&start={start}"
+PAGES_PER_SEARCH = 20
+
 excluded_countries = ["United States", "USA", "États-Unis", "India", "Pakistan","Philippines","Israel","Vietnam"]
 
 keywords = [
@@ -28,57 +47,74 @@ keywords = [
 # filter_keywords = ["zapier", "make.com", "n8n", "Integromat", "Data", "python","Uipath", "automation anywhere", "power apps", "power automate", "Mendix", "rpa","GEO"]
 
 # Step 1 — Scrape job links
-links = []
-api_url_job = []
+search_cache = SearchCache()
+job_index = JobIndex() # Dedups search hits on the numeric job ID and keeps every keyword that found them
 
 for keyword in keywords:  # ✅ search each keyword separately
-    for i in range(0, 20):  # Increase range for more pages
-        url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location=Rabat%2C%20Rabat-Sal%C3%A9-K%C3%A9nitra%2C%20Morocco&geoId=107116391&f_TPR=r86400&start={i*25}"
+    if budget.search_expired(len(job_index)):
+        print("⚠️ Step 1 time budget reached! Keeping the rest of the run for job details and the Sheets write.")
+        break
+    for i in range(0, PAGES_PER_SEARCH):
+        url = SEARCH_URL_TEMPLATE.format(keyword=keyword, start=i*25)
         headers = {"User-Agent": "Mozilla/5.0"}
         
-        time.sleep(1)
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        job_links = soup.find_all("a", class_="base-card__full-link")
-
-        for job in job_links:
-            job_url = job.get("href")
-            if job_url and job_url not in links:
-                links.append((job_url, keyword))  # ✅ Store URL + searched keyword
-                match = re.search(r'-([0-9]+)\?', job_url)
-                if match:
-                    job_id = match.group(1)
-                    api_link = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-                    api_url_job.append(api_link)
-
+        try:
+            # Served from the shared on-disk cache when another scraper fetched this page recently
+            page_html = search_cache.fetch(url, headers=headers)
+            cards = parse_search_cards(page_html)
+        except Exception as e:
+            # e.g. rate_control.ThrottledError: keep what was found and move on to the next keyword
+            print(f"Error fetching search page for {keyword}: {e}")
+            break
+        for card in cards:
+            job_index.add(card.url, keyword, card)
+
+        # An empty page means this keyword has no more results, the following pages would be empty too
+        if not cards:
+            break
+
+links = job_index.links()
+api_url_job = job_index.api_urls()
 print(f"Total job links found: {len(links)}")
+print(search_cache.summary())
+
+# Skip excluded countries before Step 2, from the location on each job's search card
+links, skipped_by_card = keep_unmatched(links, job_index.card_locations(link for link, _ in links), excluded_countries)
+print(f"🌍 {skipped_by_card} postings in excluded countries dropped from their search cards ({skipped_by_card} detail fetches saved).")
 
 # Step 2 — Scrape job details
 data = []
 headers = {"User-Agent": "Mozilla/5.0"}
+records_from_cards = 0
 
 for link, searched_keyword in links:
-    try:
-        time.sleep(1)
-        response = requests.get(link, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title_tag = soup.find('h1', class_='top-card-layout__title') or soup.find('h2', class_='top-card-layout__title')
-        title = title_tag.text.strip() if title_tag else "Not Found"
-
-        company_tag = soup.find('a', class_='topcard__org-name-link')
-        company = company_tag.text.strip() if company_tag else "Not Found"
+    if budget.details_expired():
+        print("⚠️ Step 2 time budget reached, writing the records scraped so far.")
+        break
 
-        country_tag = soup.find('span', class_='topcard__flavor--bullet')
-        country = country_tag.text.strip() if country_tag else "Not Found"
-
-        desc_tag = soup.find('div', class_='description__text--rich')
-        desc = desc_tag.text.strip() if desc_tag else "Not Found"
+    # Card-only mode: the sheet's fields are all on the search card, the job page is only needed to fill a gap
+    card = job_index.card_for(link) if CARD_ONLY else None
+    if card and card.title and card.company and card.location:
+        data.append({
+            "Date" : date_str,
+            "title": card.title,
+            "company": card.company,
+            "country": card.location,
+            "link": link,
+            "searched_keyword": searched_keyword,
+            "description": None # Not on the card
+        })
+        records_from_cards += 1
+        continue
 
-        # Skip excluded countries
-        if any(excluded.lower() in country.lower() for excluded in excluded_countries):
-            continue
+    try:
+        # Already in memory when the orchestrator crawled this posting for every scraper
+        page_html = prefetched_page(link)
+        if page_html is None:
+            page_html = rate_control.get(link, headers=headers).text
+        budget.record_detail()
+        details = parse_job_page(page_html)
+        title, company, country = details.title, details.company, details.country
 
         # ✅ Find which filter keywords appear in the description
         #found_keywords = [k for k in filter_keywords if re.search(rf'\b{k}\b', desc, flags=re.IGNORECASE)]
@@ -90,15 +126,28 @@ for link, searched_keyword in links:
             "company": company,
             "country": country,
             "link": link,
-            "searched_keyword": searched_keyword
+            "searched_keyword": searched_keyword,
+            "description": details.description # Archived only, the sheet keeps its columns
         })
 
     except Exception as e:
         print(f"Error scraping {link}: {e}")
 
+if CARD_ONLY:
+    print(f"🪪 Card-only mode: {records_from_cards} records built from search cards, "
+          f"{len(links) - records_from_cards} job pages fetched for missing card fields.")
+print(rate_control.RATE_CONTROLLER.summary())
+print(budget.summary())
+
 # Step 3 — Create DataFrame
 df = pd.DataFrame(data)
+# Skip excluded countries in one vectorized pass
+df = drop_matching(df, "country", excluded_countries)
 df = df.drop_duplicates(subset=['link']).reset_index(drop=True)
+# Keep every raw record in the local columnar archive, then drop descriptions from the sheet
+if not df.empty:
+    archive_postings(df, "rh")  # Scrape date, like every other source (the sheet's Date column stays yesterday's)
+df = df.drop(columns=['description'], errors='ignore')
 
 
 # Show result
@@ -121,12 +170,9 @@ except gspread.WorksheetNotFound:
 
 #print("Rows to upload:", len(filtered_df))
 
-sheet.clear()
-sheet.update(
-    [df.columns.values.tolist()] +
-    df.values.tolist()
-)
+# Only the rows that changed are sent, keyed on the job link; the tab is never cleared
+sync = SheetSink(sheet, "link").write(df)
 
-print("\n✅ Data successfully updated in Google Sheets!")
+print(f"\n✅ Data successfully updated in Google Sheets! {sync.summary(WORKSHEET_NAME)}")
 
 
@@ -1,20 +1,28 @@
 import time
-import requests
-from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
 import gspread
 from google.oauth2.service_account import Credentials
+from checkpoint import RESUME_RUN, RunCheckpoint
+from frame_filters import contains_any, drop_matching, first_email, keep_unmatched
+from job_index import JobIndex
+from search_cache import SearchCache
+from seen_jobs import ONLY_NEW_POSTINGS, SeenJobsStore
+from sheet_sink import SheetSink
+from job_parser import parse_lead_page, parse_search_cards
+from linkedin_fetch import fetch_job_details
+from posting_archive import archive_postings
+from rate_control import RATE_CONTROLLER
+from run_budget import run_max_duration, run_start_time
 
 # ==========================================
 # --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
 # ==========================================
-START_TIME = time.time()
+START_TIME = run_start_time()  # Start of this script's slice of the batch when routed by the orchestrator
 # 5.5 hours = 5.5 * 60 * 60 = 19,800 seconds
-MAX_DURATION_SECONDS = 21000 
+MAX_DURATION_SECONDS = run_max_duration(21000)
 
 def has_time_expired():
     """Returns True if the script has been running for more than 5.5 hours."""
@@ -32,6 +40,10 @@ countries = [
     "Portugal", "Czech Republic", "Lithuania", "Luxembourg", "Switzerland", "Denmark", "Finland", "Sweden", "Norway"
 ]
 
+# LinkedIn guest search endpoint and how many 25-result pages are read per search
+SEARCH_URL_TEMPLATE = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location={country}&f_TPR=r86400&start={start}"
+PAGES_PER_SEARCH = 20
+
 excluded_countries = ["United States", "USA", "États-Unis", "India", "Pakistan", "Philippines", "Israel", "Vietnam"]
 
 # Optional: Add keywords if you want to search by specific terms, or leave empty for all jobs
@@ -40,55 +52,71 @@ keywords_for_scraping = [""]
 # ==========================================
 # --- STEP 1 — SCRAPE JOB LINKS ---
 # ==========================================
-links = []
-api_url_job = []
-break_step1 = False
+search_cache = SearchCache()
+checkpoint = RunCheckpoint("leads")
+resumed = checkpoint.load() if RESUME_RUN else None
+
+if resumed:
+    job_index = resumed["job_index"]
+    search_queries = resumed["pending_queries"]
+    details_by_link = resumed["details"]
+    print(f"♻️ Resuming from checkpoint: {len(search_queries)} search pages and {len(resumed['pending_links'])} job links left.")
+else:
+    job_index = JobIndex() # Dedups search hits on the numeric job ID and keeps every keyword that found them
+    search_queries = [
+        (country, keyword, i)
+        for country in countries
+        for keyword in keywords_for_scraping
+        for i in range(0, PAGES_PER_SEARCH)
+    ]
+    details_by_link = {}
+pending_queries = []
+exhausted_searches = set() # (country, keyword) pairs that already returned an empty page
 
 print("🚀 Starting Step 1: Scraping job links...")
-for country in countries:
-    if break_step1:
+for position, (country, keyword, i) in enumerate(search_queries):
+    if (country, keyword) in exhausted_searches:
+        continue
+
+    # --- Safetime Check ---
+    if has_time_expired():
+        print("⚠️ Approaching 5.5 hours limit during Step 1! Breaking out early.")
+        pending_queries = search_queries[position:]
         break
-        
-    for keyword in keywords_for_scraping:
-        if break_step1:
-            break
-            
-        for i in range(0, 20):  # Iterate through pages
-            
-            # --- Safetime Check ---
-            if has_time_expired():
-                print("⚠️ Approaching 5.5 hours limit during Step 1! Breaking out early.")
-                break_step1 = True
-                break
-
-            url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keyword}&location={country}&f_TPR=r86400&start={i*25}"
-            headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-
-            time.sleep(1)
-            try:
-                response = requests.get(url, headers=headers)
-                soup = BeautifulSoup(response.text, "html.parser")
-                job_links = soup.find_all("a", class_="base-card__full-link")
-
-                # Break out of page loop if no jobs are returned on this page
-                if not job_links:
-                    break
-
-                for job in job_links:
-                    job_url = job.get("href")
-                    if job_url and job_url not in links: # Check if URL is already present
-                        links.append(job_url)
-                        
-                        match = re.search(r'-([0-9]+)\?', job_url)
-                        if match:
-                            job_id = match.group(1)
-                            api_link = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-                            api_url_job.append(api_link)
-                            
-            except Exception as e:
-                print(f"Error fetching search page for {country}: {e}")
 
+    url = SEARCH_URL_TEMPLATE.format(keyword=keyword, country=country, start=i*25)
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+    try:
+        # Served from the shared on-disk cache when another scraper fetched this page recently
+        page_html = search_cache.fetch(url, headers=headers)
+        cards = parse_search_cards(page_html)
+
+        # Skip the remaining pages of this search if no jobs are returned on this page
+        if not cards:
+            exhausted_searches.add((country, keyword))
+
+        for card in cards:
+            job_index.add(card.url, keyword, card)
+    except Exception as e:
+        print(f"Error fetching search page for {country}: {e}")
+
+    checkpoint.save_periodically(search_queries[position + 1:], job_index, details_by_link)
+
+links = job_index.urls()
+api_url_job = job_index.api_urls()
 print(f"Total unique job links found: {len(links)}")
+print(search_cache.summary())
+
+# --- Skip excluded countries before Step 2, from the location on each job's search card ---
+links, skipped_by_card = keep_unmatched(links, job_index.card_locations(links), excluded_countries)
+print(f"🌍 {skipped_by_card} postings in excluded countries dropped from their search cards ({skipped_by_card} detail fetches saved).")
+
+# --- Only-new mode: skip postings an earlier run already scraped ---
+seen_jobs = SeenJobsStore("leads")
+if ONLY_NEW_POSTINGS:
+    links = [link for link in links if link in details_by_link or job_index.job_id_for(link) not in seen_jobs]
+    print(f"Only-new mode: {len(links)} postings were not scraped by an earlier run.")
 
 
 # ==========================================
@@ -97,96 +125,62 @@ print(f"Total unique job links found: {len(links)}")
 all_job_data = [] # Stores all scraped job details before filtering
 headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
-print("🚀 Starting Step 2: Scraping specific job profiles...")
-for link in links:
-    
-    # --- Safetime Check ---
-    if has_time_expired():
-        print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Processing existing ({len(all_job_data)}) records.")
-        break
-
-    try:
-        time.sleep(1)
-        response = requests.get(link, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
+def record_job_details(link, details):
+    """Keeps each parsed page and checkpoints progress every few minutes."""
+    details_by_link[link] = details
+    seen_jobs.add(job_index.job_id_for(link))
+    checkpoint.save_periodically(pending_queries, job_index, details_by_link, links)
 
-        title_tag = soup.find('h1', class_='top-card-layout__title') or soup.find('h2', class_='top-card-layout__title')
-        title = title_tag.text.strip() if title_tag else "N/A"
-
-        company_tag = soup.find('a', class_='topcard__org-name-link')
-        company = company_tag.text.strip() if company_tag else "N/A"
-
-        country_tag = soup.find('span', class_='topcard__flavor--bullet')
-        country = country_tag.text.strip() if country_tag else "N/A"
-
-        # 1. Profile Name
-        try:
-            name_tag = soup.find('h3', class_='base-main-card__title')
-            profil_name = name_tag.text.strip() if name_tag else "N/A"
-        except Exception:
-            profil_name = "N/A"
-        
-        # 2. Profile Tag / Headline
-        try:
-            tag_element = soup.find('h4', class_='base-main-card__subtitle')
-            profil_tag = tag_element.text.strip() if tag_element else "N/A"
-        except Exception:
-            profil_tag = "N/A"
-        
-        # 3. Profile URL
-        try:
-            url_tag = soup.find('a', class_='base-card__full-link')
-            raw_url = url_tag.get('href', 'N/A') if url_tag else "N/A"
-            
-            # Check if it's a genuine LinkedIn profile URL
-            if raw_url != "N/A" and "/in/" in raw_url:
-                profil_url = raw_url.split('?')[0]
-            else:
-                profil_url = "N/A"
-        except Exception:
-            profil_url = "N/A"
-
-        # 4. Job Description Extraction
-        try:
-            desc_tag = soup.find('div', class_='show-more-less-html__markup') or soup.find('div', class_='description__text')
-            job_description = desc_tag.text.strip() if desc_tag else "N/A"
-        except Exception:
-            job_description = "N/A"
-
-        # 5. Email Search & Extraction via Regex
-        email_pattern = r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'
-        found_emails = re.findall(email_pattern, job_description)
-        email_address = found_emails[0] if found_emails else "N/A"
-
-        # Skip excluded countries
-        if any(excluded.lower() in country.lower() for excluded in excluded_countries):
-            continue
-
-        all_job_data.append({
-            "Date": today_date_str,
-            "title": title,
-            "company": company,
-            "country": country,
-            "link": link,
-            "profil_name": profil_name,
-            "profil_tag": profil_tag,
-            "profil_url": profil_url,
-            "job_description": job_description,
-            "email": email_address
-        })
+print("🚀 Starting Step 2: Scraping specific job profiles...")
+# Pages are fetched concurrently; workers stop picking up new links once the safeguard fires
+fetch_job_details(
+    [link for link in links if link not in details_by_link],
+    parse=parse_lead_page,
+    should_stop=has_time_expired,
+    on_result=record_job_details,
+    headers=headers,
+)
+print(RATE_CONTROLLER.summary())
+
+# --- Safetime Check ---
+if has_time_expired():
+    print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Processing existing ({len(details_by_link)}) records.")
+
+# Keep whatever is left (search pages, job links) for the next --resume run
+checkpoint.finish(pending_queries, job_index, details_by_link, links)
 
-    except Exception as e:
-        print(f"Error scraping details for {link}: {e}")
+for link in links:
+    details = details_by_link.get(link)
+    if details is None:
+        continue
+
+    all_job_data.append({
+        "Date": today_date_str,
+        "title": details.title,
+        "company": details.company,
+        "country": details.country,
+        "link": link,
+        "profil_name": details.profil_name,
+        "profil_tag": details.profil_tag,
+        "profil_url": details.profil_url,
+        "job_description": details.job_description,
+    })
 
 
 # ==========================================
 # --- STEP 3 TO 5 — PROCESS & SAVE TO GOOGLE SHEETS ---
 # ==========================================
-if not all_job_data:
+# Skip excluded countries (one vectorized pass over the whole run)
+df_jobs = drop_matching(pd.DataFrame(all_job_data), "country", excluded_countries)
+if df_jobs.empty:
     print("❌ No data was parsed during this execution window. Google Sheets will remain unchanged.")
 else:
     # --- Step 3 — Create DataFrame & Filter Data ---
-    df_jobs = pd.DataFrame(all_job_data)
+    # Email Search & Extraction via Regex, column-wise
+    email_pattern = r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'
+    df_jobs['email'] = first_email(df_jobs['job_description'], email_pattern)
+    # Keep every raw record, before the N/A and tag filters, in the local columnar archive
+    archive_postings(df_jobs, "leads", today_date_str)
     
     # 1. Remove any row that contains "N/A" in core columns (ignoring email/description N/A so rows aren't wiped out)
     core_columns = ["Date", "title", "company", "country", "link", "profil_name", "profil_tag", "profil_url"]
@@ -197,8 +191,7 @@ else:
     
     # 3. Filter rows where 'profil_tag' contains specific keywords (case-insensitive)
     filter_keywords = ["senior", "lead", "director", "direcotr", "founder", "co-founder","Managing","Partner"]
-    pattern = '|'.join(filter_keywords)
-    df_jobs = df_jobs[df_jobs['profil_tag'].str.contains(pattern, case=False, na=False)].reset_index(drop=True)
+    df_jobs = df_jobs[contains_any(df_jobs['profil_tag'], filter_keywords)].reset_index(drop=True)
     
     # 4. Reorder columns to match your Google Sheet layout
     columns_order = [
@@ -230,21 +223,19 @@ else:
                 # Write header row if worksheet is newly created
                 worksheet.append_row(columns_order, value_input_option='USER_ENTERED')
 
-            print(f"\n🧹 Clearing previous data from '{WORKSHEET_NAME}' (Row 1 headers will remain intact)...")
-
-            # 1. Clear all rows from Row 2 down
-            worksheet.batch_clear(['A2:Z10000'])
+            print(f"🚀 Syncing {len(df_jobs)} fresh records into '{WORKSHEET_NAME}' (only changed rows are written)...")
 
-            print(f"🚀 Writing {len(df_jobs)} fresh records starting at cell A2...")
+            # Rows are matched on the job link: new ones inserted, changed ones rewritten, stale ones deleted
+            sync = SheetSink(worksheet, "link", value_input_option='USER_ENTERED').write(df_jobs)
 
-            # 2. Write the new dataset starting at cell A2
-            worksheet.update('A2', df_jobs.values.tolist(), value_input_option='USER_ENTERED')
-
-            print(f"✅ Successfully updated '{WORKSHEET_NAME}' with {len(df_jobs)} fresh records!")
+            print(f"✅ Successfully updated {sync.summary(WORKSHEET_NAME)}")
 
         except KeyError as e:
             print(f"❌ Missing environment variable: {e}")
         except Exception as e:
             print(f"❌ Error updating Google Sheets: {e}")
 
+# Remember what this run scraped so --only-new runs can skip it
+seen_jobs.commit()
+
 print(f"🏁 Execution finished gracefully. Total time elapsed: {round((time.time() - START_TIME) / 60, 2)} minutes.")
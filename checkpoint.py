@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+
+from job_index import JobIndex
+from job_parser import JobDetails
+from search_cache import CACHE_DIR
+
+# Pass --resume to a scraper to continue the work left in its last checkpoint
+RESUME_RUN = "--resume" in sys.argv
+CHECKPOINT_INTERVAL_SECONDS = 120
+# Searches use f_TPR=r86400, so a checkpoint from a previous day's crawl is not worth resuming
+CHECKPOINT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+class RunCheckpoint:
+    """
+    JSON state file holding a scraper's unfinished work: the Step 1 search pages still to visit
+    (country, keyword, page), the job index built so far, the parsed job records and the job links
+    still waiting for Step 2. Writes go through a temp file and os.replace, so a killed run never
+    leaves a truncated checkpoint behind.
+    """
+
+    def __init__(self, name, directory=CACHE_DIR):
+        self.path = os.path.join(directory, f"checkpoint_{name}.json")
+        self.saved_at = time.time()
+
+    def load(self):
+        """Returns the saved state, or None when there is no usable checkpoint."""
+        if not os.path.exists(self.path):
+            print("ℹ️ No checkpoint found, starting a fresh crawl.")
+            return None
+
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if time.time() - state["saved_at"] > CHECKPOINT_MAX_AGE_SECONDS:
+            print("ℹ️ Checkpoint is older than 24 hours, starting a fresh crawl.")
+            return None
+
+        return {
+            "pending_queries": [tuple(query) for query in state["pending_queries"]],
+            "job_index": JobIndex.from_state(state["job_index"]),
+            "details": {link: JobDetails(**details) for link, details in state["details"].items()},
+            "pending_links": state["pending_links"],
+        }
+
+    def save(self, pending_queries, job_index, details, links=None):
+        """Writes the current progress. `links` are the job links Step 2 should visit (defaults to every indexed job)."""
+        links = job_index.urls() if links is None else links
+        state = {
+            "saved_at": time.time(),
+            "pending_queries": [list(query) for query in pending_queries],
+            "job_index": job_index.to_state(),
+            "details": {link: asdict(record) for link, record in details.items()},
+            "pending_links": [link for link in links if link not in details],
+        }
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self.saved_at = state["saved_at"]
+
+    def save_periodically(self, pending_queries, job_index, details, links=None):
+        """Same as save(), but only once every CHECKPOINT_INTERVAL_SECONDS."""
+        if time.time() - self.saved_at >= CHECKPOINT_INTERVAL_SECONDS:
+            self.save(pending_queries, job_index, details, links)
+
+    def finish(self, pending_queries, job_index, details, links=None):
+        """Keeps a checkpoint when work is left over for a --resume run, deletes it otherwise."""
+        links = job_index.urls() if links is None else links
+        pending_links = [link for link in links if link not in details]
+        if pending_queries or pending_links:
+            self.save(pending_queries, job_index, details, links)
+            print(f"💾 Checkpoint saved: {len(pending_queries)} search pages and {len(pending_links)} job links left. "
+                  f"Run again with --resume to continue.")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,64 @@
+import json
+import os
+import re
+
+from search_cache import CACHE_DIR
+
+# ==========================================
+# --- PRIORITY CONFIGURATION ---
+# ==========================================
+PRIORITY_KEYWORD_PRIOR = 0.6   # Assumed hit rate of a search keyword that is itself one of the sheet's filter keywords
+DEFAULT_PRIOR = 0.1            # Assumed hit rate of any other search keyword until it has history
+PRIOR_WEIGHT = 10              # Fetched jobs it takes before a keyword's own history outweighs its prior
+TITLE_SIGNAL_WEIGHT = 0.5      # Added when the card title mentions one of the signal keywords
+
+
+class DetailPrioritizer:
+    """
+    Scores job links before their pages are fetched, so Step 2 fetches the jobs most likely to
+    pass the sheet filter first. A job's score is the best smoothed hit rate among the keywords
+    that found it (jobs that passed the filter / jobs fetched, per searched keyword, kept as JSON
+    in the cache directory) plus a bonus when its search-card title mentions a signal keyword.
+    """
+
+    def __init__(self, name, priority_keywords, signal_keywords, directory=CACHE_DIR):
+        self.path = os.path.join(directory, f"keyword_hit_rates_{name}.json")
+        self.history = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.history = json.load(f)
+        self.priority_keywords = {keyword.lower() for keyword in priority_keywords}
+        self.signal_pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(keyword) for keyword in signal_keywords) + r')\b', re.IGNORECASE
+        )
+
+    def hit_rate(self, keyword):
+        """Share of this keyword's fetched jobs that passed the filter, smoothed towards its prior."""
+        prior = PRIORITY_KEYWORD_PRIOR if keyword.lower() in self.priority_keywords else DEFAULT_PRIOR
+        stats = self.history.get(keyword, {"fetched": 0, "hits": 0})
+        return (stats["hits"] + PRIOR_WEIGHT * prior) / (stats["fetched"] + PRIOR_WEIGHT)
+
+    def score(self, keywords, card_title=None):
+        score = max((self.hit_rate(keyword) for keyword in keywords), default=DEFAULT_PRIOR)
+        if card_title and self.signal_pattern.search(card_title):
+            score += TITLE_SIGNAL_WEIGHT
+        return score
+
+    def record_results(self, fetched_keywords, hit_links):
+        """
+        Updates the per-keyword history from one run. `fetched_keywords` maps every fetched job link
+        to the keywords that found it; `hit_links` are the links that passed the sheet filter.
+        """
+        hit_links = set(hit_links)
+        for link, keywords in fetched_keywords.items():
+            for keyword in keywords:
+                stats = self.history.setdefault(keyword, {"fetched": 0, "hits": 0})
+                stats["fetched"] += 1
+                stats["hits"] += link in hit_links
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.history, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
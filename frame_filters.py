@@ -0,0 +1,160 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Same address pattern app.py has always used for the Email column
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
+def contains_any(texts, terms):
+    """Boolean array: does each text contain any of `terms` (case-insensitive substrings)?"""
+    lowered = texts.fillna("").astype(str).str.lower()
+    found = np.zeros(len(lowered), dtype=bool)
+    for term in terms:
+        found |= lowered.str.contains(term.lower(), regex=False).to_numpy()
+    return found
+
+
+def keep_unmatched(items, texts, terms):
+    """
+    `items` whose paired text (e.g. a job's search-card location) contains none of `terms`,
+    and how many were dropped. Unknown texts (None) are kept.
+    """
+    items = list(items)
+    if not items or not terms:
+        return items, 0
+    dropped = contains_any(pd.Series(list(texts), dtype=object), terms)
+    return [item for item, drop in zip(items, dropped) if not drop], int(dropped.sum())
+
+
+def drop_matching(df, column, terms):
+    """
+    Rows of `df` whose `column` contains none of `terms` (case-insensitive substrings),
+    e.g. postings located in one of the excluded countries. Empty frames pass through.
+    """
+    if df.empty or column not in df or not terms:
+        return df
+    return df[~contains_any(df[column], terms)].reset_index(drop=True)
+
+
+class KeywordTagger:
+    """
+    Tags every text of a Series with the keywords it contains, one column of a rows x keywords
+    match matrix at a time. Texts are lowercased once, so each keyword is a case-sensitive scan:
+    a plain substring test, or with `whole_word` a precompiled pattern that starts with the literal
+    keyword (letting the regex engine jump straight to candidate positions) and checks the word
+    boundaries around it afterwards. Matches are the same as one `\\bkeyword\\b` IGNORECASE search
+    per keyword per row.
+    """
+
+    def __init__(self, keywords, whole_word=True):
+        self.keywords = list(keywords)
+        self.patterns = []
+        for keyword in self.keywords:
+            literal = re.escape(keyword.lower())
+            self.patterns.append(
+                re.compile(literal + r'\b(?<=\b' + literal + ')') if whole_word else keyword.lower()
+            )
+
+    def matrix(self, texts):
+        """Boolean rows x keywords array of matches."""
+        lowered = texts.fillna("").astype(str).str.lower()
+        found = np.zeros((len(lowered), len(self.keywords)), dtype=bool)
+        for column, pattern in enumerate(self.patterns):
+            found[:, column] = lowered.str.contains(pattern, regex=not isinstance(pattern, str)).to_numpy()
+        return found
+
+    def tag(self, texts):
+        """Comma-separated keywords found in each text, in `keywords` order ("" when none)."""
+        found = self.matrix(texts)
+        tags = np.full(len(texts), "", dtype=object)
+        for column, keyword in enumerate(self.keywords):
+            tags = tags + np.where(found[:, column], keyword + ", ", "").astype(object)
+        return pd.Series(tags, index=texts.index, dtype=object).str[:-2]
+
+
+def keyword_matches(texts, keywords, whole_word=True):
+    """Comma-separated `keywords` found in each text of `texts` ("" when none)."""
+    return KeywordTagger(keywords, whole_word).tag(texts)
+
+
+def extract_emails(texts, pattern=EMAIL_PATTERN):
+    """Unique email addresses of each text, sorted and comma-separated ("" when none)."""
+    texts = texts.fillna("").astype(str)
+    emails = pd.Series("", index=texts.index, dtype=object)
+    # Only texts with an "@" can hold an address, and a plain substring test is far cheaper than the regex
+    candidates = texts.str.contains("@", regex=False)
+    if candidates.any():
+        emails[candidates] = [", ".join(sorted(set(found))) for found in texts[candidates].str.findall(pattern)]
+    return emails
+
+
+def first_email(texts, pattern, missing="N/A"):
+    """First address matching `pattern` (a regex string) in each text, or `missing`."""
+    texts = texts.fillna("").astype(str)
+    emails = pd.Series(missing, index=texts.index, dtype=object)
+    candidates = texts.str.contains("@", regex=False)
+    if candidates.any():
+        emails[candidates] = texts[candidates].str.extract("(" + pattern + ")", expand=False).fillna(missing)
+    return emails
+
+
+# ==========================================
+# --- BENCHMARK AGAINST THE PER-ROW APPLY ---
+# ==========================================
+if __name__ == "__main__":
+    import random
+    import time
+
+    from script_config import read_script_constants
+
+    constants = read_script_constants("app.py", "linkedin_worldwide_filter_keywords", "excluded_countries")
+    worldwide_keywords = constants["linkedin_worldwide_filter_keywords"]
+    excluded_countries = constants["excluded_countries"]
+    indeed_keywords = ['n8n', 'Zapier', 'make.com', 'Integromat', 'data', 'GEO']
+
+    random.seed(42)
+    filler = ("we are looking for a motivated engineer to join our team and build reliable "
+              "systems with modern tooling across data platforms and customer workflows").split()
+    vocabulary = filler * 20 + worldwide_keywords + indeed_keywords + ["jobs@acme.io", "hr@example.com"]
+    locations = ["Paris, France", "Dubai, United Arab Emirates", "Austin, Texas, United States", "Bengaluru, India",
+                 "Tokyo, Japan", "Zurich, Switzerland"]
+    df = pd.DataFrame({
+        "description": [" ".join(random.choices(vocabulary, k=150)) for _ in range(100_000)],
+        "country": random.choices(locations, k=100_000),
+    })
+
+    def reference_emails(text):
+        return ", ".join(sorted(set(re.findall(EMAIL_PATTERN.pattern, text))))
+
+    def reference_worldwide(description):
+        found = [k for k in worldwide_keywords if re.search(r'\b' + re.escape(k) + r'\b', description, flags=re.IGNORECASE)]
+        return ", ".join(found)
+
+    def reference_indeed(description):
+        return ", ".join(kw for kw in indeed_keywords if kw.lower() in description.lower())
+
+    def reference_countries(frame):
+        keep = frame["country"].apply(lambda country: not any(e.lower() in country.lower() for e in excluded_countries))
+        return frame[keep].reset_index(drop=True)
+
+    stages = [
+        ("Emails", lambda: df["description"].apply(reference_emails), lambda: extract_emails(df["description"])),
+        ("Worldwide keywords", lambda: df["description"].apply(reference_worldwide),
+         lambda: keyword_matches(df["description"], worldwide_keywords)),
+        ("Indeed keywords", lambda: df["description"].apply(reference_indeed),
+         lambda: keyword_matches(df["description"], indeed_keywords, whole_word=False)),
+        ("Excluded countries", lambda: reference_countries(df), lambda: drop_matching(df, "country", excluded_countries)),
+    ]
+    print(f"{len(df)} synthetic postings")
+    for name, reference, vectorized in stages:
+        start = time.perf_counter()
+        expected = reference()
+        reference_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        result = vectorized()
+        vectorized_seconds = time.perf_counter() - start
+        assert result.equals(expected), name
+        print(f"{name:<20} per-row: {reference_seconds:6.2f}s   vectorized: {vectorized_seconds:6.2f}s   "
+              f"(x{reference_seconds / vectorized_seconds:.1f}, identical output)")
@@ -0,0 +1,493 @@
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+import pandas as pd
+
+from frame_filters import KeywordTagger
+from job_parser import IndeedCard, indeed_job_key, parse_indeed_job_page, parse_indeed_search_page
+from rate_control import RATE_CONTROLLER, retry_after_seconds
+
+# ==========================================
+# --- WORKER POOL CONFIGURATION ---
+# ==========================================
+# Worker processes crawling Indeed in parallel, each owning a share of the country domains
+INDEED_WORKERS = int(os.environ.get("INDEED_WORKERS", os.cpu_count() or 1))
+SEARCH_PAGES_PER_CITY = 10
+CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
+WORKER_POLL_SECONDS = 5   # How often the parent checks for crashed workers while waiting for results
+# Job pages are only opened for cards whose title and snippet match no keyword (only the description
+# can) or that lack a field; the other records carry the snippet and are tagged on title + snippet.
+# Pass --all-job-pages to open every job page again (full descriptions for every record).
+ALL_JOB_PAGES = "--all-job-pages" in sys.argv
+
+# ==========================================
+# --- HTTP-FIRST FETCHING ---
+# ==========================================
+# Pass --browser-only to send every page through Chrome again (to compare)
+HTTP_FIRST = "--browser-only" not in sys.argv
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 4
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+HTTP_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+# Responses of Indeed's bot protection (Cloudflare interstitials, captchas) instead of the page
+CHALLENGE_STATUSES = {403, 429, 503}
+CHALLENGE_MARKERS = ("just a moment", "cf-chl", "challenge-platform", "captcha", "verify you are human")
+NO_RESULTS_MARKER = "jobsearch-NoResult"
+# After this many challenges in a row on one domain, its remaining pages go straight to the browser
+BROWSER_AFTER_CHALLENGES = 3
+
+# ==========================================
+# --- BROWSER PROFILE ---
+# ==========================================
+# Pass --full-browser to load every resource and keep the old fixed sleeps (to compare page times)
+LEAN_BROWSER = "--full-browser" not in sys.argv
+SEARCH_PAGE_TIMEOUT = 10
+JOB_PAGE_TIMEOUT = 5
+JOB_CARD_SELECTOR = "a.tapItem"
+NO_RESULTS_SELECTOR = ".jobsearch-NoResult-messageContainer, [data-testid='jobsearch-NoResult']"
+# Requests Chrome drops before they leave the browser: images, media, fonts, stylesheets and trackers
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.mp4", "*.webm",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*optimizely.com*", "*bat.bing.com*", "*clarity.ms*",
+]
+LEAN_CONTENT_SETTINGS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.fonts": 2,
+    "profile.managed_default_content_settings.stylesheets": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+
+def new_driver():
+    """
+    Headless Chrome for Indeed. The lean profile (default) returns from driver.get() once the
+    DOM is parsed ("eager") and never downloads images, fonts, stylesheets or trackers; the
+    scraper then waits on the elements it needs instead of sleeping.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")  # newer headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    if LEAN_BROWSER:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", LEAN_CONTENT_SETTINGS)
+    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+    if LEAN_BROWSER:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+class PageTimer:
+    """Seconds from the request until a page's wanted content was there (HTTP response, or browser elements), per page kind."""
+
+    def __init__(self):
+        self.samples = {}   # kind -> [seconds]
+
+    def record(self, kind, started_at):
+        self.samples.setdefault(kind, []).append(time.perf_counter() - started_at)
+
+    def merge(self, samples):
+        for kind, seconds in samples.items():
+            self.samples.setdefault(kind, []).extend(seconds)
+
+    def summary(self):
+        profile = "lean browser profile" if LEAN_BROWSER else "full browser profile"
+        parts = []
+        for kind, seconds in sorted(self.samples.items()):
+            ordered = sorted(seconds)
+            parts.append(f"{kind}: {len(ordered)} loaded, avg {sum(ordered) / len(ordered):.2f}s, "
+                         f"median {ordered[len(ordered) // 2]:.2f}s")
+        return f"⏱️ Page load times ({profile}): " + ("; ".join(parts) if parts else "no pages loaded.")
+
+
+class FetchStats:
+    """How each page kind was fetched: over plain HTTP, or by the browser and why HTTP was not enough."""
+
+    def __init__(self):
+        self.counts = {}   # kind -> {route: pages}
+
+    def record(self, kind, route):
+        routes = self.counts.setdefault(kind, {})
+        routes[route] = routes.get(route, 0) + 1
+
+    def merge(self, counts):
+        for kind, routes in counts.items():
+            for route, pages in routes.items():
+                self.counts.setdefault(kind, {})
+                self.counts[kind][route] = self.counts[kind].get(route, 0) + pages
+
+    def summary(self):
+        parts = []
+        total = in_browser = 0
+        for kind, routes in sorted(self.counts.items()):
+            pages = sum(routes.values())
+            fallbacks = {route: count for route, count in routes.items() if route != "http"}
+            total += pages
+            in_browser += sum(fallbacks.values())
+            reasons = ", ".join(f"{count} {route}" for route, count in sorted(fallbacks.items()))
+            parts.append(f"{kind}: {pages} ({routes.get('http', 0)} HTTP, {sum(fallbacks.values())} browser"
+                         + (f": {reasons})" if reasons else ")"))
+        if not total:
+            return "🌐 Indeed fetches: no pages fetched."
+        return f"🌐 Indeed fetches: {'; '.join(parts)}. {in_browser / total:.0%} of pages needed the browser."
+
+
+class IndeedFetcher:
+    """
+    One worker's way to Indeed: every page is first requested over plain HTTP through a pooled
+    session, and only responses that are bot challenges or lack the data the parsers need go to
+    a browser, opened on the first such page and kept warm for the rest of the worker's domains.
+    Cookies the browser earns are copied into the session, so later HTTP requests can reuse them.
+    """
+
+    def __init__(self, timer, stats):
+        self.timer = timer
+        self.stats = stats
+        self.session = requests.Session()
+        self.session.headers.update(HTTP_HEADERS)
+        self.session.mount("https://", HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+        self.driver = None
+        self.challenges = {}   # host -> challenged HTTP responses in a row
+
+    def browser(self):
+        if self.driver is None:
+            print("🧭 Opening the fallback browser")
+            self.driver = new_driver()
+        return self.driver
+
+    def close(self):
+        self.session.close()
+        if self.driver is not None:
+            self.driver.quit()
+
+    def _http_get(self, kind, url):
+        """(html, None) for a 200 HTTP response, else (None, why the browser has to fetch the page)."""
+        if not HTTP_FIRST:
+            return None, "browser only"
+        host = urlsplit(url).netloc
+        if self.challenges.get(host, 0) >= BROWSER_AFTER_CHALLENGES:
+            return None, "challenged domain"
+
+        pacing = RATE_CONTROLLER.for_url(url)
+        time.sleep(pacing.reserve())
+        time.sleep(pacing.pause_remaining())  # A Retry-After or challenge backoff set since the slot was reserved
+        started_at = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            return None, "HTTP error"
+        if response.status_code in CHALLENGE_STATUSES:
+            # Challenges slow the domain down too; the backoff grows with consecutive challenges
+            pacing.record_throttle(self.challenges.get(host, 0), retry_after_seconds(response.headers))
+        elif response.status_code == 200:
+            pacing.record_success()
+
+        if response.status_code in CHALLENGE_STATUSES:
+            return None, self._challenged(url)
+        if response.status_code != 200:
+            return None, "empty"
+        self.timer.record(f"{kind} (HTTP)", started_at)
+        return response.text or "", None
+
+    def _challenged(self, url):
+        host = urlsplit(url).netloc
+        self.challenges[host] = self.challenges.get(host, 0) + 1
+        return "challenge"
+
+    def _unusable(self, url, html):
+        """Why a 200 response the parser found nothing in cannot be used: a challenge page, or an empty one."""
+        lowered = html.lower()
+        if any(marker in lowered for marker in CHALLENGE_MARKERS):
+            return self._challenged(url)
+        return "empty"
+
+    def _served_over_http(self, kind, url):
+        self.challenges[urlsplit(url).netloc] = 0
+        self.stats.record(kind, "http")
+
+    def _adopt_cookies(self):
+        for cookie in self.driver.get_cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+    def search_page(self, city, url, page):
+        """
+        The search page's IndeedCards ([] past the last page), or None when even the browser
+        found neither job cards nor a "no results" message.
+        """
+        html, reason = self._http_get("search pages", url)
+        if html is not None:
+            cards = parse_indeed_search_page(html, url)
+            if cards is not None or NO_RESULTS_MARKER in html:
+                self._served_over_http("search pages", url)
+                return cards or []
+            reason = self._unusable(url, html)  # A 200 without the job-cards payload
+        self.stats.record("search pages", reason)
+
+        driver = self.browser()
+        started_at = time.perf_counter()
+        driver.get(url)
+        if not LEAN_BROWSER:
+            time.sleep(2)
+        try:
+            # Returns as soon as either the job cards or Indeed's "no results" message is in the DOM
+            WebDriverWait(driver, SEARCH_PAGE_TIMEOUT).until(EC.any_of(
+                EC.presence_of_element_located((By.CSS_SELECTOR, JOB_CARD_SELECTOR)),
+                EC.presence_of_element_located((By.CSS_SELECTOR, NO_RESULTS_SELECTOR)),
+            ))
+            self.timer.record("search pages (browser)", started_at)
+        except TimeoutException:
+            return None
+        self._adopt_cookies()
+
+        cards = parse_indeed_search_page(driver.page_source, driver.current_url)
+        if cards is None:
+            # No embedded payload: fall back to the card links, whose job pages then have every field
+            print(f"ℹ️ No embedded results on page {page+1} for {city}, reading the card links instead")
+            cards = []
+            for element in driver.find_elements(By.CSS_SELECTOR, JOB_CARD_SELECTOR):
+                try:
+                    link = element.get_attribute("href")
+                except Exception:
+                    continue
+                if link:
+                    cards.append(IndeedCard(job_key=indeed_job_key(link), url=link))
+        return cards
+
+    def job_page(self, url):
+        """JobDetails of a view-job page, or None when even the browser found no job description."""
+        html, reason = self._http_get("job pages", url)
+        if html is not None:
+            details = parse_indeed_job_page(html)
+            if details is not None:
+                self._served_over_http("job pages", url)
+                return details
+            reason = self._unusable(url, html)
+        self.stats.record("job pages", reason)
+
+        driver = self.browser()
+        started_at = time.perf_counter()
+        driver.get(url)
+        if not LEAN_BROWSER:
+            time.sleep(1)
+        try:
+            WebDriverWait(driver, JOB_PAGE_TIMEOUT).until(
+                EC.presence_of_element_located((By.ID, "jobDescriptionText"))
+            )
+            self.timer.record("job pages (browser)", started_at)
+        except TimeoutException:
+            return None
+        self._adopt_cookies()
+        details = parse_indeed_job_page(driver.page_source)
+        if not LEAN_BROWSER:
+            time.sleep(1.5)
+        return details
+
+
+def _needs_job_page(cards, keywords):
+    """
+    True for the cards whose own text cannot settle the keyword filter: cards missing a field,
+    and cards whose title and snippet mention none of `keywords` (only the full description can).
+    """
+    texts = pd.Series([" ".join(filter(None, (card.title, card.snippet))) for card in cards], dtype=object)
+    decided = KeywordTagger(keywords, whole_word=False).matrix(texts).any(axis=1)
+    return [not (is_decided and card.title and card.company and card.location)
+            for card, is_decided in zip(cards, decided)]
+
+
+def scrape_city(fetcher, city, ext, keywords, seen_job_keys):
+    """
+    Every job record of one Indeed domain. Search pages give each job's card from the page's
+    embedded JSON (deduped on the `jk` job key against `seen_job_keys`), then a job page is only
+    opened when the card cannot settle the keyword filter; the other records keep the card's
+    snippet and no description. With --all-job-pages every job page is opened.
+    """
+    print(f"\n🌆 Scraping jobs for {city} ({ext}.indeed.com)")
+    job_data = []
+    cards = []
+
+    try:
+        for page in range(0, SEARCH_PAGES_PER_CITY):
+            url = f'https://{ext}.indeed.com/jobs?q=&l={city}&radius=25&fromage=1&from=searchOnDesktopSerp&start={page * 10}'
+            print(f"🌍 Page {page+1}: {url}")
+            page_cards = fetcher.search_page(city, url, page)
+            if page_cards is None:
+                print(f"⚠️ No job cards found for {city} on page {page+1}")
+                continue  # skip to next page/city
+            if not page_cards:
+                print(f"ℹ️ No more results for {city} after page {page}")
+                break
+            for card in page_cards:
+                key = card.job_key or card.url
+                if key not in seen_job_keys:
+                    seen_job_keys.add(key)
+                    cards.append(card)
+
+            print(f"✅ Collected {len(cards)} jobs for {city}")
+
+        if not cards:
+            print(f"ℹ️ No job links to visit for {city}")
+            return job_data
+
+        needs_page = [True] * len(cards) if ALL_JOB_PAGES else _needs_job_page(cards, keywords)
+        print(f"\n🔎 Visiting {sum(needs_page)} of {len(cards)} job pages for {city} (the other cards already match a keyword)")
+        for card, open_page in zip(cards, needs_page):
+            if not open_page:
+                job_data.append({
+                    "City": city,
+                    "Title": card.title,
+                    "Company": card.company,
+                    "Location": card.location,
+                    "Description": None,  # Not fetched: the keyword match comes from the title and snippet
+                    "Snippet": card.snippet,
+                    "Link": card.url
+                })
+                continue
+
+            link = card.url
+            print(f"Visiting {link}")
+            details = fetcher.job_page(link)
+            if details is None:
+                print(f"❌ Could not extract job details for {link}")
+                continue
+            title = card.title or details.title or "N/A"
+            company = card.company or details.company or "N/A"
+            location = card.location or details.country or "N/A"
+            job_data.append({
+                "City": city,
+                "Title": title,
+                "Company": company,
+                "Location": location,
+                "Description": details.description or "N/A",
+                "Snippet": card.snippet,
+                "Link": link
+            })
+            print(f"🏢 {company} | 📍 {location} | 💼 {title}")
+
+    except Exception as e:
+        print(f"⚠️ Error scraping {city}: {e}")  # Keep what this city produced so far
+
+    return job_data
+
+
+# ==========================================
+# --- WORKER POOL ---
+# ==========================================
+def _crawl_domains(city_ext_map, keywords, results):
+    """
+    Worker: one fetcher (HTTP session, plus a fallback browser if needed) for its share of the
+    domains, each city's records put on `results` once done, then (None, (page timings, fetch
+    counts)) when the worker is finished.
+    """
+    timer = PageTimer()
+    stats = FetchStats()
+    fetcher = IndeedFetcher(timer, stats)
+    seen_job_keys = set()  # Shared by this worker's cities; merge_records dedups across workers
+    try:
+        for city, ext in city_ext_map.items():
+            results.put((city, scrape_city(fetcher, city, ext, keywords, seen_job_keys)))
+    finally:
+        fetcher.close()
+        results.put((None, (timer.samples, stats.counts)))
+
+
+def _split_domains(city_ext_map, workers):
+    """Round-robin shares of the domains, one per worker."""
+    items = list(city_ext_map.items())
+    return [dict(items[worker::workers]) for worker in range(workers)]
+
+
+def merge_records(records_by_city, cities):
+    """Concatenates the per-city records in `cities` order, keeping the first record of each job (`jk` key, else link)."""
+    merged, seen = [], set()
+    for city in cities:
+        for record in records_by_city.get(city, []):
+            key = indeed_job_key(record["Link"]) or record["Link"]
+            if key not in seen:
+                seen.add(key)
+                merged.append(record)
+    return merged
+
+
+def crawl(city_ext_map, keywords, workers=INDEED_WORKERS):
+    """
+    Scrapes every domain of `city_ext_map` with `workers` processes sharing one result
+    queue, then merges and dedups their records. `keywords` are the sheet's filter keywords,
+    which decide which job pages have to be opened. With a single worker everything runs in this process.
+    """
+    workers = max(1, min(workers, len(city_ext_map)))
+    records_by_city = {}
+    timer = PageTimer()
+    stats = FetchStats()
+
+    if workers == 1:
+        results = queue.SimpleQueue()
+        _crawl_domains(city_ext_map, keywords, results)
+        while not results.empty():
+            city, payload = results.get()
+            if city is None:
+                timer.merge(payload[0])
+                stats.merge(payload[1])
+            else:
+                records_by_city[city] = payload
+        print(stats.summary())
+        print(timer.summary())
+        return merge_records(records_by_city, city_ext_map)
+
+    # Workers are forked: the scrapers are top-level scripts, which a spawned process would run again
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_crawl_domains, args=(share, keywords, results), daemon=True)
+        for share in _split_domains(city_ext_map, workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"🧵 {len(processes)} workers started for {len(city_ext_map)} Indeed domains.")
+
+    # Drain the queue before joining, and stop waiting for a worker that died without reporting
+    finished = 0
+    while finished < len(processes):
+        try:
+            item = results.get(timeout=WORKER_POLL_SECONDS)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                print("⚠️ Some Indeed workers exited without finishing, keeping the records received so far.")
+                break
+            continue
+        city, payload = item
+        if city is None:
+            timer.merge(payload[0])
+            stats.merge(payload[1])
+            finished += 1
+        else:
+            records_by_city[city] = payload
+    for process in processes:
+        process.join(timeout=WORKER_POLL_SECONDS)
+
+    print(stats.summary())
+    print(timer.summary())
+    return merge_records(records_by_city, city_ext_map)
@@ -0,0 +1,117 @@
+import re
+from dataclasses import asdict
+
+from job_parser import JobCard
+
+# Same pattern the scrapers use to pull the numeric ID out of a job URL, also accepting
+# canonical URLs whose tracking query string has already been stripped
+JOB_ID_PATTERN = re.compile(r'-([0-9]+)(?:\?|/?$)')
+
+
+def extract_job_id(job_url):
+    """Returns the numeric LinkedIn job ID in a job URL, or None when it has none."""
+    match = JOB_ID_PATTERN.search(job_url)
+    return match.group(1) if match else None
+
+
+def canonical_job_url(job_url):
+    """Drops the per-search tracking query string (refId, trackingId, ...) from a job URL."""
+    return job_url.split('?')[0]
+
+
+def job_posting_api_url(job_id):
+    """Builds the guest jobPosting API URL for a job ID."""
+    return f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
+
+
+class JobIndex:
+    """
+    Ordered set of search results keyed on the numeric job ID.
+    Every search hit is recorded, so a job found by several keywords keeps all of them,
+    while the job itself is stored once under the URL it was first seen with.
+    """
+
+    def __init__(self):
+        self.jobs = {}          # key -> {"job_id", "url", "keywords", "card"}
+        self.keys_by_url = {}   # canonical URL -> key
+
+    def to_state(self):
+        """JSON-serialisable snapshot of the index, in discovery order."""
+        return [dict(entry) for entry in self.jobs.values()]
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls()
+        for entry in state:
+            key = entry["job_id"] or entry["url"]
+            index.jobs[key] = {
+                "job_id": entry["job_id"], "url": entry["url"], "keywords": list(entry["keywords"]), "card": entry.get("card"),
+            }
+            index.keys_by_url[entry["url"]] = key
+        return index
+
+    @staticmethod
+    def _key(job_url):
+        return extract_job_id(job_url) or canonical_job_url(job_url)
+
+    def add(self, job_url, keyword=None, card=None):
+        """Records a search hit for `job_url` (and its search-result JobCard). Returns True the first time the job is seen."""
+        key = self._key(job_url)
+        entry = self.jobs.get(key)
+        is_new = entry is None
+        if is_new:
+            url = canonical_job_url(job_url)
+            entry = {"job_id": extract_job_id(job_url), "url": url, "keywords": [], "card": None}
+            self.jobs[key] = entry
+            self.keys_by_url[url] = key
+
+        if card is not None and entry["card"] is None:
+            entry["card"] = asdict(card)
+
+        if keyword is not None and keyword not in entry["keywords"]:
+            entry["keywords"].append(keyword)
+        return is_new
+
+    def __contains__(self, job_url):
+        return self._key(job_url) in self.jobs
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get(self, job_url):
+        """Returns the entry stored for a job URL (raw or canonical), or None."""
+        key = self.keys_by_url.get(job_url) or self._key(job_url)
+        return self.jobs.get(key)
+
+    def job_id_for(self, job_url):
+        entry = self.get(job_url)
+        return entry["job_id"] if entry else None
+
+    def keywords_for(self, job_url):
+        entry = self.get(job_url)
+        return list(entry["keywords"]) if entry else []
+
+    def card_for(self, job_url):
+        """The JobCard the job was first listed with in search results, or None."""
+        entry = self.get(job_url)
+        return JobCard(**entry["card"]) if entry and entry["card"] else None
+
+    def card_locations(self, job_urls):
+        """Search-card location of each job URL (None when the job has no card or the card no location)."""
+        locations = []
+        for job_url in job_urls:
+            entry = self.get(job_url)
+            locations.append(entry["card"].get("location") if entry and entry["card"] else None)
+        return locations
+
+    def urls(self):
+        """Canonical job URLs in discovery order."""
+        return [entry["url"] for entry in self.jobs.values()]
+
+    def links(self):
+        """(canonical URL, comma-separated searched keywords) pairs in discovery order."""
+        return [(entry["url"], ", ".join(entry["keywords"])) for entry in self.jobs.values()]
+
+    def api_urls(self):
+        """jobPosting API URLs for every indexed job that has a numeric ID."""
+        return [job_posting_api_url(entry["job_id"]) for entry in self.jobs.values() if entry["job_id"]]
@@ -0,0 +1,376 @@
+import json
+import os
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from lxml import html as lxml_html
+
+# "lxml" (default) runs precompiled XPath over an lxml tree, "soup" parses only the needed subtrees with html.parser
+PARSER_BACKEND = os.environ.get("JOB_PARSER_BACKEND", "lxml")
+
+
+@dataclass
+class JobDetails:
+    """Fields extracted from a job page (LinkedIn, or Indeed's view-job page) or jobPosting fragment. Missing fields are None."""
+    title: Optional[str] = None
+    company: Optional[str] = None
+    country: Optional[str] = None
+    description: Optional[str] = None       # description__text--rich block used by the worldwide scrapers
+    job_description: Optional[str] = None   # show-more-less markup block used by the Recruiters scraper
+    profil_name: Optional[str] = None       # "Meet the hiring team" poster card
+    profil_tag: Optional[str] = None
+    profil_url: Optional[str] = None
+
+    def filled(self, placeholder):
+        """Copy with every missing field replaced by the scraper's placeholder ("Not Found", "N/A")."""
+        return replace(self, **{f.name: placeholder for f in fields(self) if getattr(self, f.name) is None})
+
+
+@dataclass
+class JobCard:
+    """Fields shown on a search-result card, available before the job page itself is fetched."""
+    url: str
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+
+
+@dataclass
+class IndeedCard:
+    """One Indeed search result, keyed on Indeed's `jk` job key. The snippet is a short plain-text excerpt."""
+    job_key: Optional[str]
+    url: str
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    snippet: Optional[str] = None
+
+
+# ==========================================
+# --- FIELD SELECTORS ---
+# ==========================================
+# (tag, class) pairs per field in priority order, mirroring the original `soup.find(...) or soup.find(...)` chains
+FIELD_SELECTORS = {
+    "title": [("h1", "top-card-layout__title"), ("h2", "top-card-layout__title")],
+    "company": [("a", "topcard__org-name-link")],
+    "country": [("span", "topcard__flavor--bullet")],
+    "description": [("div", "description__text--rich")],
+    "job_description": [("div", "show-more-less-html__markup"), ("div", "description__text")],
+    "profil_name": [("h3", "base-main-card__title")],
+    "profil_tag": [("h4", "base-main-card__subtitle")],
+}
+POSTER_LINK_SELECTOR = ("a", "base-card__full-link")
+CARD_LINK_SELECTOR = ("a", "base-card__full-link")
+CARD_FIELD_SELECTORS = {
+    "title": ("h3", "base-search-card__title"),
+    "company": ("h4", "base-search-card__subtitle"),
+    "location": ("span", "job-search-card__location"),
+}
+
+
+def _profile_url(raw_url):
+    """Keeps only genuine LinkedIn profile URLs, without their tracking parameters."""
+    return raw_url.split('?')[0] if raw_url and "/in/" in raw_url else None
+
+
+# ==========================================
+# --- LXML BACKEND (PRECOMPILED XPATH) ---
+# ==========================================
+def _class_xpath(tag, css_class):
+    """XPath equivalent of the CSS selector `tag.css_class` (first match in document order)."""
+    return etree.XPath(
+        f"(//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')])[1]"
+    )
+
+
+_XPATHS = {name: [_class_xpath(*selector) for selector in selectors] for name, selectors in FIELD_SELECTORS.items()}
+_POSTER_LINK_XPATH = _class_xpath(*POSTER_LINK_SELECTOR)
+
+
+def _parse_html(html):
+    """
+    lxml tree of a page, or None for bodies lxml refuses: empty, comment- or BOM-only documents
+    (ParserError) and str input with an <?xml encoding?> declaration (ValueError).
+    """
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+_TEXT_NODES_XPATH = etree.XPath(".//text()")
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+def _soup_text(element):
+    """
+    An element's text as BeautifulSoup's `.text` gives it: html.parser collapses every whitespace-only
+    string to a single newline (or a space when it has none), lxml keeps them as they are.
+    """
+    return "".join(
+        ("\n" if "\n" in node else " ") if not node.strip(_ASCII_SPACES) else node
+        for node in _TEXT_NODES_XPATH(element)
+    )
+
+
+def _extract_with_lxml(html):
+    tree = _parse_html(html)
+    if tree is None:
+        return JobDetails()  # lxml refuses such documents, html.parser just finds nothing
+    values = {}
+    for name, selectors in _XPATHS.items():
+        values[name] = None
+        for selector in selectors:
+            found = selector(tree)
+            if found:
+                values[name] = _soup_text(found[0]).strip()
+                break
+
+    poster_link = _POSTER_LINK_XPATH(tree)
+    values["profil_url"] = _profile_url(poster_link[0].get("href") if poster_link else None)
+    return JobDetails(**values)
+
+
+# ==========================================
+# --- SOUP BACKEND (PARTIAL PARSE) ---
+# ==========================================
+_NEEDED_CLASSES = sorted({css_class for selectors in FIELD_SELECTORS.values() for _, css_class in selectors}
+                         | {POSTER_LINK_SELECTOR[1]})
+# Only elements carrying one of the needed classes (and their subtrees) are built into the soup.
+# The class attribute is still a raw string while the strainer runs, so match whole words inside it.
+_NEEDED_SUBTREES = SoupStrainer(
+    class_=re.compile(r'(?:^|\s)(?:' + '|'.join(map(re.escape, _NEEDED_CLASSES)) + r')(?:\s|$)')
+)
+
+
+def _find_fields(soup):
+    values = {}
+    for name, selectors in FIELD_SELECTORS.items():
+        values[name] = None
+        for tag, css_class in selectors:
+            found = soup.find(tag, class_=css_class)
+            if found:
+                values[name] = found.text.strip()
+                break
+
+    poster_link = soup.find(*POSTER_LINK_SELECTOR)
+    values["profil_url"] = _profile_url(poster_link.get('href') if poster_link else None)
+    return JobDetails(**values)
+
+
+def _extract_with_soup(html):
+    return _find_fields(BeautifulSoup(html, "html.parser", parse_only=_NEEDED_SUBTREES))
+
+
+def _extract_reference(html):
+    """The original full-document BeautifulSoup(html.parser) extraction, kept as the parity baseline."""
+    return _find_fields(BeautifulSoup(html, "html.parser"))
+
+
+BACKENDS = {"lxml": _extract_with_lxml, "soup": _extract_with_soup, "reference": _extract_reference}
+
+
+# ==========================================
+# --- SEARCH-RESULT CARDS ---
+# ==========================================
+_CARD_LINKS_XPATH = etree.XPath(
+    f"//{CARD_LINK_SELECTOR[0]}[contains(concat(' ', normalize-space(@class), ' '), ' {CARD_LINK_SELECTOR[1]} ')]"
+)
+_CARD_FIELD_XPATHS = {
+    name: etree.XPath(f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]")
+    for name, (tag, css_class) in CARD_FIELD_SELECTORS.items()
+}
+
+
+def parse_search_cards(html):
+    """
+    One JobCard per job link on a search-result page, in page order. Cards are the same
+    `a.base-card__full-link` anchors Step 1 collects, with title/company/location read from the
+    surrounding result (its <li>, or the anchor's parent when the page has no list markup).
+    """
+    tree = _parse_html(html)
+    if tree is None:
+        return []
+    cards = []
+    for link in _CARD_LINKS_XPATH(tree):
+        href = link.get("href")
+        if not href:
+            continue
+        container = next(iter(link.xpath("ancestor::li[1]")), None)
+        if container is None:
+            container = link.getparent() if link.getparent() is not None else link
+        values = {}
+        for name, selector in _CARD_FIELD_XPATHS.items():
+            found = selector(container)
+            values[name] = found[0].text_content().strip() if found else None
+        cards.append(JobCard(url=href, **values))
+    return cards
+
+
+# ==========================================
+# --- INDEED SEARCH PAGES (EMBEDDED JSON) ---
+# ==========================================
+# Indeed renders its result list from this inline payload, so every card field is in the page source
+MOSAIC_JOBCARDS_PATTERN = re.compile(r'window\.mosaic\.providerData\["mosaic-provider-jobcards"\]\s*=\s*')
+INDEED_JOB_KEY_PATTERN = re.compile(r'[?&]jk=([0-9a-f]+)')
+
+
+def indeed_job_key(url):
+    """Indeed's `jk` job key in a job URL, or None."""
+    match = INDEED_JOB_KEY_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def _html_text(fragment):
+    tree = _parse_html(fragment)
+    if tree is None:
+        return None
+    return " ".join(tree.text_content().split())
+
+
+def parse_indeed_search_page(html, base_url):
+    """
+    IndeedCards of a search page, read from its embedded mosaic job-cards JSON, in page order.
+    Returns None when the page has no such payload (a challenge page, or a layout change).
+    """
+    match = MOSAIC_JOBCARDS_PATTERN.search(html or "")
+    if not match:
+        return None
+    try:
+        payload, _ = json.JSONDecoder().raw_decode(html, match.end())
+        results = payload["metaData"]["mosaicProviderJobCardsModel"]["results"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    cards = []
+    for result in results:
+        job_key = result.get("jobkey")
+        if not job_key:
+            continue
+        cards.append(IndeedCard(
+            job_key=job_key,
+            url=urljoin(base_url, f"/viewjob?jk={job_key}"),
+            title=result.get("displayTitle") or result.get("title"),
+            company=result.get("company") or result.get("truncatedCompany"),
+            location=result.get("formattedLocation"),
+            snippet=_html_text(result.get("snippet")),
+        ))
+    return cards
+
+
+# ==========================================
+# --- INDEED JOB PAGES ---
+# ==========================================
+# Same elements the Selenium scraper waited for and read
+_INDEED_JOB_XPATHS = {
+    "title": etree.XPath("//h1"),
+    "company": etree.XPath('//div[@data-company-name="true"]//a'),
+    "country": etree.XPath('//div[@data-testid="inlineHeader-companyLocation"]//div'),
+}
+_INDEED_DESCRIPTION_XPATH = etree.XPath('//*[@id="jobDescriptionText"]')
+_BLOCK_TAGS = {"p", "div", "li", "br", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr"}
+
+
+def _block_text(element):
+    """Text of an element with one line per block, close to what the browser shows as its .text."""
+    for child in element.iter():
+        if child.tag in _BLOCK_TAGS:
+            child.tail = "\n" + (child.tail or "")
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def parse_indeed_job_page(html):
+    """
+    JobDetails (title, company, country = location, description) of an Indeed view-job page.
+    Returns None when the page has no job description (a challenge page, or a removed job).
+    """
+    tree = _parse_html(html)
+    if tree is None:
+        return None
+    description = _INDEED_DESCRIPTION_XPATH(tree)
+    if not description:
+        return None
+    values = {}
+    for name, selector in _INDEED_JOB_XPATHS.items():
+        found = selector(tree)
+        values[name] = (found[0].text_content().strip() or None) if found else None
+    return JobDetails(description=_block_text(description[0]), **values)
+
+
+# ==========================================
+# --- PUBLIC PARSERS ---
+# ==========================================
+def extract_job_details(html, backend=None):
+    """Parses a job page or jobPosting fragment into a JobDetails record."""
+    return BACKENDS[backend or PARSER_BACKEND](html)
+
+
+def parse_job_page(html):
+    """Job fields for the worldwide/remote/FDE scrapers, with "Not Found" placeholders."""
+    return extract_job_details(html).filled("Not Found")
+
+
+def parse_lead_page(html):
+    """Job and poster-card fields for the Recruiters scraper, with "N/A" placeholders."""
+    return extract_job_details(html).filled("N/A")
+
+
+def check_parity(html):
+    """Returns {field: {backend: value}} for every field where a backend disagrees with the reference parse."""
+    results = {name: extract(html) for name, extract in BACKENDS.items()}
+    mismatches = {}
+    for f in fields(JobDetails):
+        values = {name: getattr(details, f.name) for name, details in results.items()}
+        if len(set(values.values())) > 1:
+            mismatches[f.name] = values
+    return mismatches
+
+
+# ==========================================
+# --- PARITY CHECK AGAINST SAVED PAGES ---
+# ==========================================
+# Representative LinkedIn pages (full job page, jobPosting fragment, lead page with a poster card,
+# page with missing fields) and the fields the reference parse must find in each
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_fixtures")
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python job_parser.py [saved .html file or directory ...]   (defaults to parser_fixtures/)
+    paths = []
+    for arg in sys.argv[1:] or [FIXTURES_DIR]:
+        if os.path.isdir(arg):
+            paths.extend(sorted(os.path.join(arg, name) for name in os.listdir(arg) if name.endswith(".html")))
+        else:
+            paths.append(arg)
+    with open(os.path.join(FIXTURES_DIR, "expected.json"), encoding="utf-8") as f:
+        expected_fields = json.load(f)
+
+    failures = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        mismatches = check_parity(html)
+        expected = expected_fields.get(os.path.basename(path)) if os.path.dirname(os.path.abspath(path)) == FIXTURES_DIR else None
+        if expected is not None:
+            reference = extract_job_details(html, "reference")
+            for name, value in expected.items():
+                if getattr(reference, name) != value:
+                    mismatches[name] = {"expected": value, "reference": getattr(reference, name)}
+        if mismatches:
+            failures += 1
+            print(f"❌ {path}")
+            for name, values in mismatches.items():
+                print(f"   {name}: {values}")
+        else:
+            print(f"✅ {path}")
+
+    print(f"\n{len(paths) - failures}/{len(paths)} pages parse identically with every backend.")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import time
+import zlib
+
+import aiohttp
+
+from job_index import extract_job_id, job_posting_api_url
+from job_parser import extract_job_details, parse_job_page
+import rate_control
+
+# ==========================================
+# --- FETCH ENGINE CONFIGURATION ---
+# ==========================================
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+MAX_CONCURRENCY = 8           # Simultaneous requests in flight, paced per host by rate_control
+PIPELINE_QUEUE_SIZE = 200     # Job links waiting for a detail worker before the search crawl pauses
+REQUEST_TIMEOUT_SECONDS = 30
+# "page" downloads the full public job page, "posting" the much smaller jobs-guest jobPosting fragment
+FETCH_MODE = os.environ.get("LINKEDIN_FETCH_MODE", "page")
+
+# zlib-compressed pages already downloaded in this process (by the orchestrator), keyed on job ID
+PREFETCHED_PAGES = {}
+
+
+# ==========================================
+# --- CONCURRENT DETAIL FETCHING ---
+# ==========================================
+def fetch_url_for(link, fetch_mode):
+    """URL to download for a job link: the link itself, or its jobPosting fragment in "posting" mode."""
+    if fetch_mode == "posting":
+        job_id = extract_job_id(link)
+        if job_id:
+            return job_posting_api_url(job_id)
+    return link
+
+
+def prefetched_page(link):
+    """The page the orchestrator already fetched for a job link, or None."""
+    prefetched = PREFETCHED_PAGES.get(extract_job_id(link) or link)
+    return zlib.decompress(prefetched).decode("utf-8") if prefetched is not None else None
+
+
+async def _fetch_one(session, link, rate_controller, parse, should_stop, on_result, fetch_mode, results):
+    url = fetch_url_for(link, fetch_mode)
+    try:
+        html = prefetched_page(link)
+        if html is None:
+            html = await rate_control.async_get_text(session, url, rate_controller, should_stop)
+        results[link] = parse(html)
+        if on_result is not None:
+            on_result(link, results[link])
+    except Exception as e:
+        print(f"Error scraping details for {link}: {e}")
+
+
+async def _fetch_worker(session, queue, rate_controller, parse, should_stop, on_result, fetch_mode, results):
+    while True:
+        try:
+            _, _, link = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        # --- Safetime Check ---
+        if should_stop is not None and should_stop():
+            return
+
+        await _fetch_one(session, link, rate_controller, parse, should_stop, on_result, fetch_mode, results)
+
+
+def _queue_item(link, priority, position):
+    """PriorityQueue entry: highest priority first, discovery order among equals."""
+    return (-priority(link) if priority is not None else 0, position, link)
+
+
+async def _fetch_all(links, parse, should_stop, on_result, fetch_mode, headers, max_concurrency, rate_controller, priority):
+    queue = asyncio.PriorityQueue()
+    for position, link in enumerate(dict.fromkeys(links)):
+        queue.put_nowait(_queue_item(link, priority, position))
+
+    results = {}
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector) as session:
+        workers = [
+            asyncio.create_task(_fetch_worker(session, queue, rate_controller, parse, should_stop, on_result, fetch_mode, results))
+            for _ in range(max_concurrency)
+        ]
+        await asyncio.gather(*workers)
+
+    return results
+
+
+def fetch_job_details(links, parse=parse_job_page, should_stop=None, on_result=None, headers=None,
+                      fetch_mode=FETCH_MODE, max_concurrency=MAX_CONCURRENCY, rate_controller=rate_control.RATE_CONTROLLER,
+                      priority=None):
+    """
+    Fetches every job link concurrently and runs `parse` on each page.
+    Returns a {link: parsed_fields} dict holding only the pages that were fetched successfully.
+    Workers stop picking up new links as soon as `should_stop()` returns True.
+    `on_result(link, parsed_fields)` is called as each page completes (used for checkpointing).
+    Requests are paced per host by `rate_controller`; links still throttled after every retry are left out.
+    With `priority(link)`, links with the highest score are fetched first instead of in the given order.
+    """
+    return asyncio.run(_fetch_all(
+        links, parse, should_stop, on_result, fetch_mode, headers or DEFAULT_HEADERS,
+        max_concurrency, rate_controller, priority,
+    ))
+
+
+# ==========================================
+# --- PIPELINED SEARCH + DETAIL CRAWL ---
+# ==========================================
+async def _pipeline_worker(session, queue, rate_controller, parse, should_stop, on_result, fetch_mode, results):
+    while True:
+        _, _, link = await queue.get()
+        if link is None:
+            return
+
+        # --- Safetime Check --- (keep draining so the search producer never blocks on a full queue)
+        if should_stop is not None and should_stop():
+            continue
+
+        await _fetch_one(session, link, rate_controller, parse, should_stop, on_result, fetch_mode, results)
+
+
+async def _crawl_pipelined(search_queries, fetch_search_page, collect_job_links, should_stop_search, parse, should_stop,
+                           on_result, fetch_mode, headers, max_concurrency, rate_controller, queue_size, priority):
+    queue = asyncio.PriorityQueue(maxsize=queue_size)
+    queued = 0
+    results = {}
+    pending_queries = []
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector) as session:
+        workers = [
+            asyncio.create_task(_pipeline_worker(session, queue, rate_controller, parse, should_stop, on_result, fetch_mode, results))
+            for _ in range(max_concurrency)
+        ]
+
+        for position, query in enumerate(search_queries):
+            if should_stop_search(queue.qsize()):
+                pending_queries = search_queries[position:]
+                break
+            # The blocking download runs in a thread next to the workers; parsing and indexing stay on the loop
+            page = await asyncio.to_thread(fetch_search_page, query)
+            for link in collect_job_links(query, page, search_queries[position + 1:]):
+                await queue.put(_queue_item(link, priority, queued))
+                queued += 1
+
+        # End-of-crawl markers sort after every real link
+        for marker in range(len(workers)):
+            await queue.put((float("inf"), marker, None))
+        await asyncio.gather(*workers)
+
+    return results, pending_queries
+
+
+def crawl_pipelined(search_queries, fetch_search_page, collect_job_links, should_stop_search, parse=parse_job_page,
+                    should_stop=None, on_result=None, headers=None, fetch_mode=FETCH_MODE, max_concurrency=MAX_CONCURRENCY,
+                    rate_controller=rate_control.RATE_CONTROLLER, queue_size=PIPELINE_QUEUE_SIZE, priority=None):
+    """
+    Runs Step 1 and Step 2 at the same time: `fetch_search_page(query)` downloads one search page in a
+    thread, `collect_job_links(query, page, remaining_queries)` indexes it and returns the job links
+    to fetch, and detail workers pick those up from a bounded queue while the next pages are crawled.
+    The crawl stops taking new search pages once `should_stop_search(queued_links)` returns True;
+    detail workers stop on `should_stop()`. With `priority(link)`, the best-scored queued link is fetched next.
+    Returns ({link: parsed_fields}, search queries that were never crawled).
+    """
+    return asyncio.run(_crawl_pipelined(
+        search_queries, fetch_search_page, collect_job_links, should_stop_search, parse, should_stop, on_result,
+        fetch_mode, headers or DEFAULT_HEADERS, max_concurrency, rate_controller, queue_size, priority,
+    ))
+
+
+# ==========================================
+# --- PAGE VS JOBPOSTING COMPARISON ---
+# ==========================================
+def compare_fetch_modes(links, headers=None):
+    """
+    Downloads each job both ways and prints bytes transferred and parse time side by side:
+    full page + BeautifulSoup(html.parser) against jobPosting fragment + precompiled lxml XPath.
+    """
+    headers = headers or DEFAULT_HEADERS
+    totals = {"page": [0, 0.0], "posting": [0, 0.0]}
+    print(f"{'job':>12} | {'page bytes':>10} {'soup ms':>8} | {'posting bytes':>13} {'lxml ms':>8} | same fields")
+    for link in links:
+        row = {}
+        for mode, backend in (("page", "reference"), ("posting", "lxml")):
+            response = rate_control.get(fetch_url_for(link, mode), headers=headers)
+            start = time.perf_counter()
+            parsed = extract_job_details(response.text, backend=backend)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            row[mode] = (len(response.content), elapsed_ms, parsed)
+            totals[mode][0] += len(response.content)
+            totals[mode][1] += elapsed_ms
+
+        same = row["page"][2] == row["posting"][2]
+        print(f"{extract_job_id(link) or '?':>12} | {row['page'][0]:>10} {row['page'][1]:>8.1f} | "
+              f"{row['posting'][0]:>13} {row['posting'][1]:>8.1f} | {'yes' if same else 'NO'}")
+
+    if links:
+        count = len(links)
+        print(f"{'average':>12} | {totals['page'][0] // count:>10} {totals['page'][1] / count:>8.1f} | "
+              f"{totals['posting'][0] // count:>13} {totals['posting'][1] / count:>8.1f} |")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python linkedin_fetch.py <job url> [<job url> ...]
+    compare_fetch_modes(sys.argv[1:])
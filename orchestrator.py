@@ -0,0 +1,205 @@
+import os
+import runpy
+import sys
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import linkedin_fetch
+from frame_filters import keep_unmatched
+from job_index import JobIndex, extract_job_id
+from job_parser import parse_search_cards
+from linkedin_fetch import DEFAULT_HEADERS, fetch_job_details
+from run_budget import RUN_MAX_SECONDS_ENV, RUN_STARTED_AT_ENV
+from script_config import read_script_constants
+from search_cache import SearchCache, normalize_search_query
+from seen_jobs import ONLY_NEW_POSTINGS, SeenJobsStore
+
+# ==========================================
+# --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
+# ==========================================
+START_TIME = time.time()
+MAX_DURATION_SECONDS = 21000        # The whole batch: crawl, then every routed scraper
+# Shared crawl budget. The routed scripts then mostly read from cache; each gets a slice of what is left
+# (passed through RUN_STARTED_AT_ENV / RUN_MAX_SECONDS_ENV), so the batch keeps one deadline.
+MAX_CRAWL_SECONDS = 4 * 60 * 60
+
+def has_time_expired():
+    """Returns True once the shared crawl has used up its budget."""
+    return time.time() - START_TIME >= MAX_CRAWL_SECONDS
+
+# ==========================================
+# --- PROFILES ---
+# ==========================================
+# Every LinkedIn scraper, with the names of its country/keyword lists. URL template and page
+# count come from each script's SEARCH_URL_TEMPLATE / PAGES_PER_SEARCH, so the scripts stay
+# the single source of truth for what they search. The pre-filters each script applies before
+# fetching job pages are mirrored too, so no posting is prefetched only to be thrown away:
+# "excluded": its excluded-countries list, tested against search-card locations;
+# "seen_jobs": its SeenJobsStore, skipped with --only-new; "card_only": its flag for records built from cards.
+PROFILES = [
+    {"script": "app.py", "countries": "countries", "keywords": "keywords_for_scraping",           # Linkedin Worldwide / Count Skills
+     "excluded": "excluded_countries", "seen_jobs": "app", "card_only": None},
+    {"script": "remote.py", "countries": "countries", "keywords": "keywords_for_scraping",        # Linkedin Remote
+     "excluded": "excluded_countries", "seen_jobs": "remote", "card_only": None},
+    {"script": "skills.py", "countries": "countries", "keywords": "keywords_for_scraping",        # FDE Excel
+     "excluded": None, "seen_jobs": None, "card_only": None},
+    {"script": "app3.py", "countries": None, "keywords": "keywords",                             # RH / COMPTABLE
+     "excluded": "excluded_countries", "seen_jobs": None, "card_only": "--card-only"},
+    {"script": "app_leads.py", "countries": "countries", "keywords": "keywords_for_scraping",     # Recruiters
+     "excluded": "excluded_countries", "seen_jobs": "leads", "card_only": None},
+]
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_search_urls(profile):
+    """Every search page URL a script requests, read from its own configuration."""
+    names = ["SEARCH_URL_TEMPLATE", "PAGES_PER_SEARCH", profile["keywords"]]
+    if profile["countries"]:
+        names.append(profile["countries"])
+    config = read_script_constants(os.path.join(BASE_DIR, profile["script"]), *names)
+
+    countries = config[profile["countries"]] if profile["countries"] else [None]
+    return [
+        config["SEARCH_URL_TEMPLATE"].format(keyword=keyword, country=country, start=i * 25)
+        for country in countries
+        for keyword in config[profile["keywords"]]
+        for i in range(0, config["PAGES_PER_SEARCH"])
+    ]
+
+
+def search_key(url):
+    """Normalized query without its `start` parameter: identifies all pages of one search."""
+    parts = urlsplit(normalize_search_query(url))
+    params = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "start"]
+    return f"{parts.path}?{urlencode(params)}"
+
+
+def plan_queries(profiles):
+    """
+    Union of every profile's search pages, deduplicated on the normalized query, in page order,
+    as (url, scripts requesting it) pairs.
+    """
+    planned = {}
+    requested = 0
+    for profile in profiles:
+        urls = profile_search_urls(profile)
+        requested += len(urls)
+        for url in urls:
+            planned.setdefault(normalize_search_query(url), (url, set()))[1].add(profile["script"])
+
+    print(f"📋 {requested} search pages requested by {len(profiles)} scrapers, {len(planned)} unique.")
+    return list(planned.values())
+
+
+def links_to_prefetch(job_index, found_by, profiles):
+    """
+    Job URLs (in discovery order) that at least one script found and will fetch after its own
+    pre-filters: card location not in its excluded countries, not already seen with --only-new,
+    and, in card-only mode, a card missing one of the fields the record needs. Also returns how
+    many job pages each script needs, which sizes its slice of the routing time.
+    """
+    needed = set()
+    pages_by_script = {}
+    for profile in profiles:
+        links = [url for url in job_index.urls() if profile["script"] in found_by.get(url, ())]
+        found = len(links)
+        if profile["excluded"]:
+            excluded = read_script_constants(os.path.join(BASE_DIR, profile["script"]), profile["excluded"])[profile["excluded"]]
+            links, _ = keep_unmatched(links, job_index.card_locations(links), excluded)
+        if ONLY_NEW_POSTINGS and profile["seen_jobs"]:
+            seen_jobs = SeenJobsStore(profile["seen_jobs"])
+            links = [url for url in links if job_index.job_id_for(url) not in seen_jobs]
+        if profile["card_only"] and profile["card_only"] in sys.argv:
+            cards = [job_index.card_for(url) for url in links]
+            links = [url for url, card in zip(links, cards) if not (card and card.title and card.company and card.location)]
+        print(f"   {profile['script']}: {len(links)} of its {found} postings need a job page.")
+        needed.update(links)
+        pages_by_script[profile["script"]] = len(links)
+    return [url for url in job_index.urls() if url in needed], pages_by_script
+
+
+# ==========================================
+# --- CRAWL ONCE ---
+# ==========================================
+def crawl(search_plan, profiles):
+    """
+    Fetches each unique search page once (into the shared cache), then once each job posting that
+    some scraper will still fetch after its own pre-filters. Returns the job pages each scraper needs.
+    """
+    search_cache = SearchCache()
+    job_index = JobIndex()
+    found_by = {}      # canonical job URL -> scripts whose searches listed it
+    exhausted = set()  # Searches whose last page came back empty; later pages would be empty too
+    cards_seen = 0
+
+    print("🚀 Crawling search pages once for all scrapers...")
+    for url, scripts in search_plan:
+        if search_key(url) in exhausted:
+            continue
+
+        # --- Safetime Check ---
+        if has_time_expired():
+            print("⚠️ Crawl budget reached during search pages, the scrapers will fetch the rest themselves.")
+            break
+
+        try:
+            page_html = search_cache.fetch(url, headers=DEFAULT_HEADERS)
+            cards = parse_search_cards(page_html)
+            if not cards:
+                exhausted.add(search_key(url))
+            for card in cards:
+                cards_seen += 1
+                job_index.add(card.url, card=card)
+                found_by.setdefault(job_index.get(card.url)["url"], set()).update(scripts)
+        except Exception as e:
+            print(f"Error fetching search page: {e}")
+
+    print(search_cache.summary())
+    print(f"Total unique job links across all scrapers: {len(job_index)} (from {cards_seen} job cards)")
+
+    prefetch, pages_by_script = links_to_prefetch(job_index, found_by, profiles)
+    print(f"🚀 Fetching each job posting once ({len(prefetch)} of {len(job_index)} pass some scraper's pre-filters)...")
+    pages = fetch_job_details(
+        prefetch,
+        parse=lambda html: zlib.compress(html.encode("utf-8")),
+        should_stop=has_time_expired,
+    )
+    for link, page in pages.items():
+        linkedin_fetch.PREFETCHED_PAGES[extract_job_id(link) or link] = page
+    print(f"✅ {len(pages)} job postings kept in memory for routing.")
+    return pages_by_script
+
+
+# ==========================================
+# --- ROUTE TO EVERY PROFILE ---
+# ==========================================
+def route(profiles, pages_by_script):
+    """
+    Runs each scraper in-process: its searches hit the cache and its postings the prefetched pages.
+    Each gets a slice of the time left, in proportion to the job pages it needs; time a scraper does
+    not use goes to the ones after it. A scraper is skipped once the batch deadline has passed.
+    """
+    deadline = START_TIME + MAX_DURATION_SECONDS
+    weights = [pages_by_script.get(profile["script"], 0) + 1 for profile in profiles]
+    for position, profile in enumerate(profiles):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            print(f"\n⏭️ Skipping {profile['script']}: the batch deadline has passed.")
+            continue
+        seconds = remaining * weights[position] / sum(weights[position:])
+        os.environ[RUN_STARTED_AT_ENV] = str(time.time())
+        os.environ[RUN_MAX_SECONDS_ENV] = str(seconds)
+        print(f"\n📤 Routing records through {profile['script']} filters and sinks "
+              f"({seconds / 60:.0f} of the {remaining / 60:.0f} minutes left)...")
+        try:
+            runpy.run_path(os.path.join(BASE_DIR, profile["script"]), run_name="__main__")
+        except Exception as e:
+            print(f"❌ {profile['script']} failed: {e}")
+
+
+if __name__ == "__main__":
+    os.chdir(BASE_DIR)
+    pages_by_script = crawl(plan_queries(PROFILES), PROFILES)
+    route(PROFILES, pages_by_script)
+    print(f"🏁 Daily batch finished. Total time elapsed: {round((time.time() - START_TIME) / 60, 2)} minutes.")
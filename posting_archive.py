@@ -0,0 +1,248 @@
+import os
+import re
+import shutil
+import subprocess
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from job_index import extract_job_id
+from search_cache import CACHE_DIR
+
+# ==========================================
+# --- ARCHIVE CONFIGURATION ---
+# ==========================================
+# Hive-partitioned Parquet: <ARCHIVE_DIR>/date=YYYY-MM-DD/source=<scraper>/postings.parquet
+# The workflows point POSTING_ARCHIVE_DIR at a checkout of ARCHIVE_BRANCH (see DURABLE STORAGE below)
+LEGACY_ARCHIVE_DIR = os.path.join(CACHE_DIR, "postings")
+ARCHIVE_DIR = os.environ.get("POSTING_ARCHIVE_DIR", LEGACY_ARCHIVE_DIR)
+ARCHIVE_BRANCH = os.environ.get("POSTING_ARCHIVE_BRANCH", "posting-archive")
+PUBLISH_ATTEMPTS = 5
+ARCHIVE_SCHEMA = pa.schema([
+    ("job_id", pa.string()),
+    ("link", pa.string()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("country", pa.string()),
+    ("searched_keyword", pa.string()),
+    ("description", pa.string()),
+    ("email", pa.string()),
+    ("profil_name", pa.string()),
+    ("profil_tag", pa.string()),
+    ("profil_url", pa.string()),
+    ("scraped_at", pa.timestamp("s")),
+])
+# Low-cardinality columns repeated across thousands of rows are stored as dictionaries
+DICTIONARY_COLUMNS = ["title", "company", "country", "searched_keyword", "profil_tag"]
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 6
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("source", pa.string())]), flavor="hive")
+
+# Scraper column names that differ from the archive's
+COLUMN_ALIASES = {"location": "country", "job_description": "description"}
+
+
+def _job_id(link):
+    """LinkedIn numeric job ID, or Indeed's `jk` key, for a job link."""
+    if not link:
+        return None
+    match = re.search(r'[?&]jk=([0-9a-f]+)', link)
+    return match.group(1) if match else extract_job_id(link)
+
+
+def _to_table(records):
+    """Normalizes a scraper's DataFrame to the archive schema (unknown columns are dropped, missing ones null)."""
+    records = records.rename(columns=lambda column: COLUMN_ALIASES.get(column.lower(), column.lower()))
+    records = records.loc[:, ~records.columns.duplicated()]
+    columns = {}
+    for field in ARCHIVE_SCHEMA:
+        if field.name == "job_id":
+            values = [_job_id(link) for link in records["link"]] if "link" in records else None
+        elif field.name == "scraped_at":
+            values = [datetime.now().replace(microsecond=0)] * len(records)
+        elif field.name in records:
+            values = [None if value is None or value != value else str(value) for value in records[field.name]]
+        else:
+            values = None
+        columns[field.name] = pa.array(values if values is not None else [None] * len(records), type=field.type)
+    return pa.table(columns, schema=ARCHIVE_SCHEMA)
+
+
+def archive_postings(records, source, date_str=None, directory=ARCHIVE_DIR):
+    """
+    Appends a run's raw records (a DataFrame with the scraper's own columns) to the
+    date/source partition. A re-run on the same day is merged into the partition's file,
+    keeping the latest record per link. Returns the number of rows in the partition.
+    """
+    date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+    partition_dir = os.path.join(directory, f"date={date_str}", f"source={source}")
+    path = os.path.join(partition_dir, "postings.parquet")
+    table = _to_table(records)
+
+    if os.path.exists(path):
+        # This run's rows come first, so the first occurrence of each link is the latest record
+        merged = pa.concat_tables([table, pq.read_table(path, schema=ARCHIVE_SCHEMA)])
+        seen, keep = set(), []
+        for position, link in enumerate(merged.column("link").to_pylist()):
+            if link is None or link not in seen:
+                keep.append(position)
+                seen.add(link)
+        table = merged.take(keep)
+
+    os.makedirs(partition_dir, exist_ok=True)
+    temp_path = path + ".tmp"
+    pq.write_table(
+        table, temp_path,
+        compression=COMPRESSION, compression_level=COMPRESSION_LEVEL,
+        use_dictionary=DICTIONARY_COLUMNS,
+    )
+    os.replace(temp_path, path)
+    return table.num_rows
+
+
+def load_postings(since=None, until=None, sources=None, columns=None, directory=ARCHIVE_DIR):
+    """
+    Reads archived postings into a DataFrame, pruning partitions on date (inclusive
+    YYYY-MM-DD bounds) and source before any file is opened.
+    """
+    if not os.path.isdir(directory):
+        return pd.DataFrame(columns=columns or ["date", "source"] + ARCHIVE_SCHEMA.names)
+    dataset = ds.dataset(directory, format="parquet", partitioning=PARTITIONING)
+    condition = None
+    for clause in (
+        ds.field("date") >= since if since else None,
+        ds.field("date") <= until if until else None,
+        ds.field("source").isin(list(sources)) if sources else None,
+    ):
+        if clause is not None:
+            condition = clause if condition is None else condition & clause
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+# ==========================================
+# --- DURABLE STORAGE (GIT DATA BRANCH) ---
+# ==========================================
+# The archive outlives the Actions cache (last writer wins across workflows, evicted after 7 days unused)
+# by living on its own branch: each workflow checks it out as a worktree, and publishes only the
+# partitions it wrote, as a fast-forward commit on top of whatever the other workflows pushed meanwhile.
+def _git(*args, directory=None, check=True):
+    command = ["git"] + (["-C", directory] if directory else []) + list(args)
+    return subprocess.run(command, check=check, capture_output=True, text=True)
+
+
+def checkout_archive(directory=ARCHIVE_DIR, branch=ARCHIVE_BRANCH):
+    """
+    Checks the archive branch out into `directory` as a worktree of the current repository (so it
+    shares its credentials), starting an empty branch the first time. Partitions still in the old
+    cache-only location are carried over. Returns the number of partitions on disk.
+    """
+    if not os.path.exists(os.path.join(directory, ".git")):
+        if _git("fetch", "--depth=1", "origin", branch, check=False).returncode == 0:
+            _git("worktree", "add", "--force", "-B", branch, directory, "FETCH_HEAD")
+        else:
+            _git("worktree", "add", "--force", "--detach", directory)
+            _git("checkout", "--orphan", branch, directory=directory)
+            _git("rm", "-r", "-f", "--quiet", "--ignore-unmatch", ".", directory=directory)
+
+    if os.path.abspath(LEGACY_ARCHIVE_DIR) != os.path.abspath(directory) and os.path.isdir(LEGACY_ARCHIVE_DIR):
+        for root, _, names in os.walk(LEGACY_ARCHIVE_DIR):
+            if "postings.parquet" in names:
+                target = os.path.join(directory, os.path.relpath(root, LEGACY_ARCHIVE_DIR), "postings.parquet")
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copy2(os.path.join(root, "postings.parquet"), target)
+
+    return sum(1 for _, _, names in os.walk(directory) if "postings.parquet" in names)
+
+
+def stage_partitions(target, directory=ARCHIVE_DIR):
+    """
+    Copies the partitions written since checkout_archive() into `target` (same relative paths), for
+    the publish job to push: the scraping job itself only has read access. Returns the files staged.
+    """
+    status = _git("status", "--porcelain", "--untracked-files=all", directory=directory).stdout
+    paths = sorted(line[3:] for line in status.splitlines() if line[3:].endswith(".parquet"))
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.join(target, path)), exist_ok=True)
+        shutil.copy2(os.path.join(directory, path), os.path.join(target, path))
+    return paths
+
+
+def publish_archive(source, directory=ARCHIVE_DIR, branch=ARCHIVE_BRANCH, attempts=PUBLISH_ATTEMPTS):
+    """
+    Adds the partitions staged in `source` to the archive branch as a single parentless snapshot
+    commit, force-pushed only if the branch still points at the tip it was built on. The branch
+    never carries history, so rewritten partitions do not pile up in the repository: it holds one
+    copy of the current archive (older snapshots become unreachable and are garbage collected).
+    A rejected push (another workflow published first) rebuilds the snapshot on the new tip;
+    partitions never conflict across sources, and a same-day, same-source partition keeps this
+    run's file. Returns the files published.
+    """
+    paths = sorted(
+        os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/")
+        for root, _, names in os.walk(source) for name in names if name.endswith(".parquet")
+    ) if os.path.isdir(source) else []
+    if not paths:
+        return []
+    checkout_archive(directory, branch)
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.join(directory, path)), exist_ok=True)
+        shutil.copy2(os.path.join(source, path), os.path.join(directory, path))
+
+    for attempt in range(attempts):
+        tip = ""
+        if _git("fetch", "--depth=1", "origin", branch, directory=directory, check=False).returncode == 0:
+            # The index becomes the remote tip; the working tree still holds this run's files
+            _git("reset", "--mixed", "FETCH_HEAD", directory=directory)
+            tip = _git("rev-parse", "FETCH_HEAD", directory=directory).stdout.strip()
+        _git("add", "--", *paths, directory=directory)
+        tree = _git("write-tree", directory=directory).stdout.strip()
+        if tip and tree == _git("rev-parse", f"{tip}^{{tree}}", directory=directory).stdout.strip():
+            return []  # Identical files are already on the branch
+        snapshot = _git("-c", "user.name=posting-archive", "-c", "user.email=posting-archive@users.noreply.github.com",
+                        "commit-tree", tree, "-m", f"Archive snapshot ({len(paths)} partition(s) updated)",
+                        directory=directory).stdout.strip()
+        # An empty lease means the branch must not exist yet
+        pushed = _git("push", f"--force-with-lease=refs/heads/{branch}:{tip}", "origin",
+                      f"{snapshot}:refs/heads/{branch}", directory=directory, check=False)
+        if pushed.returncode == 0:
+            return paths
+        print(f"⚠️ Archive push rejected (attempt {attempt + 1}/{attempts}), retrying on the new branch tip")
+        time.sleep(2 ** attempt)
+    raise RuntimeError(f"Could not publish {len(paths)} archive partitions to '{branch}'")
+
+
+# ==========================================
+# --- ARCHIVE SUMMARY ---
+# ==========================================
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python posting_archive.py checkout | stage DIR | publish DIR | [since YYYY-MM-DD] [until YYYY-MM-DD]
+    if sys.argv[1:2] == ["checkout"]:
+        print(f"🗄️ {checkout_archive()} archive partitions checked out from '{ARCHIVE_BRANCH}' into {ARCHIVE_DIR}")
+        sys.exit(0)
+    if sys.argv[1:2] == ["stage"]:
+        staged = stage_partitions(sys.argv[2])
+        print(f"🗄️ {len(staged)} archive partitions written this run staged in {sys.argv[2]}")
+        sys.exit(0)
+    if sys.argv[1:2] == ["publish"]:
+        published = publish_archive(sys.argv[2])
+        print(f"🗄️ {len(published)} archive partitions published to '{ARCHIVE_BRANCH}'")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    postings = load_postings(*sys.argv[1:3], columns=["date", "source", "link"])
+    elapsed = time.perf_counter() - start
+
+    size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(ARCHIVE_DIR) for name in names if name.endswith(".parquet")
+    ) if os.path.isdir(ARCHIVE_DIR) else 0
+    print(f"{len(postings)} archived postings ({size / 1024 / 1024:.1f} MB on disk) read in {elapsed:.2f}s")
+    if len(postings):
+        print(postings.groupby(["source"]).agg(days=("date", "nunique"), postings=("link", "count")))
@@ -0,0 +1,182 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+
+# ==========================================
+# --- RATE CONTROL CONFIGURATION ---
+# ==========================================
+# 429 is the standard "Too Many Requests", 999 is what LinkedIn answers when it throttles guests
+THROTTLE_STATUSES = {429, 999}
+INITIAL_REQUESTS_PER_SECOND = 2.0
+MIN_REQUESTS_PER_SECOND = 0.1
+MAX_REQUESTS_PER_SECOND = 5.0
+RATE_INCREASE = 0.05           # Additive increase (req/s) after every successful request
+RATE_DECREASE_FACTOR = 0.5     # Multiplicative decrease after every throttled request
+BACKOFF_BASE_SECONDS = 5       # First backoff when the server gives no Retry-After, doubled on each retry
+BACKOFF_MAX_SECONDS = 120      # Caps backoff (and Retry-After) so one host cannot eat the time budget
+MAX_RETRIES = 4
+REQUEST_TIMEOUT_SECONDS = 30      # A stalled connection counts as a throttle instead of hanging the worker
+
+
+class ThrottledError(Exception):
+    """Raised when a request is still throttled after MAX_RETRIES backoffs (or the caller ran out of time)."""
+
+
+def retry_after_seconds(headers):
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ==========================================
+# --- AIMD CONTROLLER ---
+# ==========================================
+class AdaptiveRateController:
+    """
+    AIMD request pacing for one host: the rate creeps up by RATE_INCREASE after each success and is
+    halved on each 429/999, which also pauses every request to the host for an exponential, jittered
+    backoff (or the server's Retry-After). Requests are spaced by reserving time slots, so the same
+    controller paces the sequential search loop and the concurrent detail workers.
+    """
+
+    def __init__(self, rate=INITIAL_REQUESTS_PER_SECOND):
+        self.rate = rate
+        self.next_slot = time.monotonic()
+        self.paused_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.given_up = 0
+        self.lock = threading.Lock()  # Pipelined crawls reserve slots from a search thread and the event loop
+
+    def reserve(self):
+        """Claims the next request slot and returns how many seconds to wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + 1 / self.rate
+            self.requests += 1
+            return slot - now
+
+    def pause_remaining(self):
+        """Seconds left in a backoff pause that started after this request's slot was reserved."""
+        return max(0.0, self.paused_until - time.monotonic())
+
+    def record_success(self):
+        with self.lock:
+            self.rate = min(MAX_REQUESTS_PER_SECOND, self.rate + RATE_INCREASE)
+
+    def record_throttle(self, attempt, retry_after=None):
+        """Slows down after a throttled response and pauses the host. Returns the pause in seconds."""
+        if retry_after is not None:
+            delay = min(BACKOFF_MAX_SECONDS, retry_after) + random.uniform(0, 1)
+        else:
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay = random.uniform(delay / 2, delay)  # Jitter so concurrent workers do not retry in lockstep
+        with self.lock:  # Threads throttled together must still see one pause and one decrease
+            self.throttled += 1
+            now = time.monotonic()
+            if now >= self.paused_until:  # Throttles seen during one pause only count as one decrease
+                self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate * RATE_DECREASE_FACTOR)
+            self.paused_until = max(self.paused_until, now + delay)
+        return delay
+
+
+class HostRateController:
+    """One AdaptiveRateController per host, so each domain is paced by its own responses."""
+
+    def __init__(self, rate=INITIAL_REQUESTS_PER_SECOND):
+        self.initial_rate = rate
+        self.hosts = {}
+
+    def for_url(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = AdaptiveRateController(self.initial_rate)
+        return self.hosts[host]
+
+    def summary(self):
+        requests_sent = sum(host.requests for host in self.hosts.values())
+        throttled = sum(host.throttled for host in self.hosts.values())
+        given_up = sum(host.given_up for host in self.hosts.values())
+        rates = ", ".join(f"{name} {host.rate:.2f} req/s" for name, host in self.hosts.items())
+        return (f"Rate control: {requests_sent} requests, {throttled} throttled (429/999/timeout), "
+                f"{given_up} given up. Final rates: {rates or 'none'}.")
+
+
+# Shared by every request made in this process, including scripts routed by the orchestrator
+RATE_CONTROLLER = HostRateController()
+
+
+# ==========================================
+# --- PACED REQUESTS ---
+# ==========================================
+def get(url, headers=None, controller=RATE_CONTROLLER, should_stop=None):
+    """
+    requests.get paced by the host's controller, retrying throttled responses with backoff.
+    A request that times out is treated as throttled too.
+    """
+    host = controller.for_url(url)
+    for attempt in range(MAX_RETRIES + 1):
+        time.sleep(host.reserve())
+        time.sleep(host.pause_remaining())  # A backoff another thread started after this slot was reserved
+        try:
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+        except requests.Timeout:
+            outcome = f"timeout ({REQUEST_TIMEOUT_SECONDS}s)"
+            host.record_throttle(attempt)
+        else:
+            if response.status_code not in THROTTLE_STATUSES:
+                host.record_success()
+                return response
+            outcome = f"HTTP {response.status_code}"
+            host.record_throttle(attempt, retry_after_seconds(response.headers))
+        if should_stop is not None and should_stop():
+            break
+
+    host.given_up += 1
+    raise ThrottledError(f"{outcome} after {attempt + 1} attempts: {url}")
+
+
+async def async_get_text(session, url, controller=RATE_CONTROLLER, should_stop=None):
+    """
+    aiohttp counterpart of get(): returns the body of the first non-throttled response.
+    A request that times out (or whose connection fails) is treated as throttled too.
+    """
+    host = controller.for_url(url)
+    for attempt in range(MAX_RETRIES + 1):
+        await asyncio.sleep(host.reserve())
+        await asyncio.sleep(host.pause_remaining())
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)) as response:
+                status = response.status
+                if status not in THROTTLE_STATUSES:
+                    host.record_success()
+                    return await response.text()
+                outcome = f"HTTP {status}"
+                host.record_throttle(attempt, retry_after_seconds(response.headers))
+        except asyncio.TimeoutError:
+            outcome = f"timeout ({REQUEST_TIMEOUT_SECONDS}s)"
+            host.record_throttle(attempt)
+        except aiohttp.ClientError as e:
+            outcome = f"{type(e).__name__}"
+            host.record_throttle(attempt)
+        if should_stop is not None and should_stop():
+            break
+
+    host.given_up += 1
+    raise ThrottledError(f"{outcome} after {attempt + 1} attempts: {url}")
@@ -1,19 +1,27 @@
 import time
-import requests
-from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
 import gspread
 from google.oauth2.service_account import Credentials
+from checkpoint import RESUME_RUN, RunCheckpoint
+from frame_filters import drop_matching, keep_unmatched, keyword_matches
+from job_index import JobIndex
+from job_parser import parse_search_cards
+from search_cache import SearchCache
+from seen_jobs import ONLY_NEW_POSTINGS, SeenJobsStore
+from sheet_sink import SheetSink
+from linkedin_fetch import fetch_job_details
+from posting_archive import archive_postings
+from rate_control import RATE_CONTROLLER
+from run_budget import run_max_duration, run_start_time
 
 # ==========================================
 # --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
 # ==========================================
-START_TIME = time.time()
-MAX_DURATION_SECONDS = 21000 
+START_TIME = run_start_time()  # Start of this script's slice of the batch when routed by the orchestrator
+MAX_DURATION_SECONDS = run_max_duration(21000)
 
 def has_time_expired():
     """Returns True if the script has been running for more than 5.5 hours."""
@@ -35,6 +43,10 @@ countries = [
     "Switzerland", "Estonia", "Denmark", "Finland", "Sweden", "Norway", "austria", "Ireland"
 ]
 
+# LinkedIn guest search endpoint and how many 25-result pages are read per search
+SEARCH_URL_TEMPLATE = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=Remote&{keyword}&location={country}&f_TPR=r86400&start={start}"
+PAGES_PER_SEARCH = 2
+
 excluded_countries = ["United States", "USA", "États-Unis", "India", "Pakistan", "Philippines", "Israel", "Vietnam"]
 
 keywords_for_scraping = [ 
@@ -52,113 +64,123 @@ linkedin_worldwide_filter_keywords = [
 # ==========================================
 # --- STEP 1 — SCRAPE JOB LINKS ---
 # ==========================================
-links = []
-api_url_job = []
-break_step1 = False
+search_cache = SearchCache()
+checkpoint = RunCheckpoint("remote")
+resumed = checkpoint.load() if RESUME_RUN else None
+
+if resumed:
+    job_index = resumed["job_index"]
+    search_queries = resumed["pending_queries"]
+    details_by_link = resumed["details"]
+    print(f"♻️ Resuming from checkpoint: {len(search_queries)} search pages and {len(resumed['pending_links'])} job links left.")
+else:
+    job_index = JobIndex() # Dedups search hits on the numeric job ID and keeps every keyword that found them
+    search_queries = [
+        (country, keyword, i)
+        for country in countries
+        for keyword in keywords_for_scraping
+        for i in range(0, PAGES_PER_SEARCH)
+    ]
+    details_by_link = {}
+pending_queries = []
 
 print("🚀 Starting Step 1: Scraping job links...")
-for country in countries:
-    if break_step1:
+for position, (country, keyword, i) in enumerate(search_queries):
+
+    # --- Safetime Check ---
+    if has_time_expired():
+        print("⚠️ Approaching 5.5 hours limit during Step 1! Breaking out of link collection early to save data.")
+        pending_queries = search_queries[position:]
         break
-    for keyword in keywords_for_scraping:
-        if break_step1:
-            break
-        for i in range(0, 2):  
-            
-            # --- Safetime Check ---
-            if has_time_expired():
-                print("⚠️ Approaching 5.5 hours limit during Step 1! Breaking out of link collection early to save data.")
-                break_step1 = True
-                break
-
-            url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=Remote&{keyword}&location={country}&f_TPR=r86400&start={i*25}"
-            headers = {"User-Agent": "Mozilla/5.0"}
-
-            time.sleep(1)
-            try:
-                response = requests.get(url, headers=headers)
-                soup = BeautifulSoup(response.text, "html.parser")
-                job_links = soup.find_all("a", class_="base-card__full-link")
-
-                for job in job_links:
-                    job_url = job.get("href")
-                    if job_url and job_url not in [link[0] for link in links]: 
-                        links.append((job_url, keyword))
-                        match = re.search(r'-([0-9]+)\?', job_url)
-                        if match:
-                            job_id = match.group(1)
-                            api_link = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-                            api_url_job.append(api_link)
-            except Exception as e:
-                print(f"Error fetching search page: {e}")
 
+    url = SEARCH_URL_TEMPLATE.format(keyword=keyword, country=country, start=i*25)
+    headers = {"User-Agent": "Mozilla/5.0"}
+
+    try:
+        # Served from the shared on-disk cache when another scraper fetched this page recently
+        page_html = search_cache.fetch(url, headers=headers)
+        for card in parse_search_cards(page_html):
+            job_index.add(card.url, keyword, card)
+    except Exception as e:
+        print(f"Error fetching search page: {e}")
+
+    checkpoint.save_periodically(search_queries[position + 1:], job_index, details_by_link)
+
+links = job_index.links()
+api_url_job = job_index.api_urls()
 print(f"Total unique job links found: {len(links)}")
+print(search_cache.summary())
+
+# --- Skip excluded countries before Step 2, from the location on each job's search card ---
+links, skipped_by_card = keep_unmatched(links, job_index.card_locations(link for link, _ in links), excluded_countries)
+print(f"🌍 {skipped_by_card} postings in excluded countries dropped from their search cards ({skipped_by_card} detail fetches saved).")
+
+# --- Only-new mode: skip postings an earlier run already scraped ---
+seen_jobs = SeenJobsStore("remote")
+if ONLY_NEW_POSTINGS:
+    links = [(link, keyword) for link, keyword in links if link in details_by_link or job_index.job_id_for(link) not in seen_jobs]
+    print(f"Only-new mode: {len(links)} postings were not scraped by an earlier run.")
 
 # ==========================================
 # --- STEP 2 — SCRAPE JOB DETAILS ---
 # ==========================================
 all_job_data = [] 
 headers = {"User-Agent": "Mozilla/5.0"}
+link_urls = [link for link, _ in links]
 
-print("🚀 Starting Step 2: Scraping specific job profiles...")
-for link, searched_keyword in links:
-    
-    # --- Safetime Check ---
-    if has_time_expired():
-        print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Activating fallback script to process existing ({len(all_job_data)}) records.")
-        break
-
-    try:
-        time.sleep(1)
-        response = requests.get(link, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title_tag = soup.find('h1', class_='top-card-layout__title') or soup.find('h2', class_='top-card-layout__title')
-        title = title_tag.text.strip() if title_tag else "Not Found"
-
-        company_tag = soup.find('a', class_='topcard__org-name-link')
-        company = company_tag.text.strip() if company_tag else "Not Found"
+def record_job_details(link, details):
+    """Keeps each parsed page and checkpoints progress every few minutes."""
+    details_by_link[link] = details
+    seen_jobs.add(job_index.job_id_for(link))
+    checkpoint.save_periodically(pending_queries, job_index, details_by_link, link_urls)
 
-        country_tag = soup.find('span', class_='topcard__flavor--bullet')
-        country = country_tag.text.strip() if country_tag else "Not Found"
-
-        desc_tag = soup.find('div', class_='description__text--rich')
-        desc = desc_tag.text.strip() if desc_tag else "Not Found"
+print("🚀 Starting Step 2: Scraping specific job profiles...")
+# Pages are fetched concurrently; workers stop picking up new links once the safeguard fires
+fetch_job_details(
+    [link for link in link_urls if link not in details_by_link],
+    should_stop=has_time_expired,
+    on_result=record_job_details,
+)
+print(RATE_CONTROLLER.summary())
 
-        # Skip excluded countries
-        if any(excluded.lower() in country.lower() for excluded in excluded_countries):
-            continue
+# --- Safetime Check ---
+if has_time_expired():
+    print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Activating fallback script to process existing ({len(details_by_link)}) records.")
 
-        all_job_data.append({
-            "Date": today_date_str,
-            "title": title,
-            "company": company,
-            "country": country,
-            "link": link,
-            "searched_keyword": searched_keyword,
-            "description": desc 
-        })
+# Keep whatever is left (search pages, job links) for the next --resume run
+checkpoint.finish(pending_queries, job_index, details_by_link, link_urls)
 
-    except Exception as e:
-        print(f"Error scraping details for {link}: {e}")
+for link, searched_keyword in links:
+    details = details_by_link.get(link)
+    if details is None:
+        continue
+
+    all_job_data.append({
+        "Date": today_date_str,
+        "title": details.title,
+        "company": details.company,
+        "country": details.country,
+        "link": link,
+        "searched_keyword": searched_keyword,
+        "description": details.description
+    })
 
 # ==========================================
 # --- STEP 3 TO 5 — PROCESS & SAVE DATA ---
 # ==========================================
-if not all_job_data:
+# Skip excluded countries (one vectorized pass over the whole run)
+df_all_jobs = drop_matching(pd.DataFrame(all_job_data), "country", excluded_countries)
+if df_all_jobs.empty:
     print("❌ No data was parsed during this execution window. Google Sheets will remain unchanged.")
 else:
     # --- Step 3 — Create DataFrame from all scraped data ---
-    df_all_jobs = pd.DataFrame(all_job_data)
     df_all_jobs = df_all_jobs.drop_duplicates(subset=['link']).reset_index(drop=True)
+    # Keep every raw record (descriptions included) in the local columnar archive
+    archive_postings(df_all_jobs, "remote", today_date_str)
     print(f"Total unique jobs scraped (after initial deduplication): {len(df_all_jobs)}")
 
     # --- Step 4 — Process for "Linkedin Worldwide" sheet ---
-    def check_worldwide_keywords(description):
-        found_world_keywords = [k for k in linkedin_worldwide_filter_keywords if re.search(r'\b' + re.escape(k) + r'\b', description, flags=re.IGNORECASE)]
-        return ", ".join(found_world_keywords) if found_world_keywords else ""
-
-    df_all_jobs['found_linkedin_worldwide_keywords'] = df_all_jobs['description'].apply(check_worldwide_keywords)
+    df_all_jobs['found_linkedin_worldwide_keywords'] = keyword_matches(df_all_jobs['description'], linkedin_worldwide_filter_keywords)
     filtered_worldwide_df = df_all_jobs[df_all_jobs['found_linkedin_worldwide_keywords'] != ""].copy()
 
     # Select and reorder columns for "Linkedin Worldwide" sheet
@@ -184,15 +206,11 @@ else:
         sheet_worldwide = client.open_by_url(SPREADSHEET_URL).add_worksheet(title=WORKSHEET_NAME_WORLDWIDE, rows="1000", cols="20")
 
     print(f"\nUpdating '{WORKSHEET_NAME_WORLDWIDE}' sheet...")
-    sheet_worldwide.clear() 
-    
-    if not filtered_worldwide_df.empty:
-        sheet_worldwide.update(
-            [filtered_worldwide_df.columns.values.tolist()] +
-            filtered_worldwide_df.values.tolist()
-        )
-    else:
-        sheet_worldwide.update([["Date", "title", "company", "country", "link", "searched_keyword", "Found Keywords"]])
-    print(f"✅ Data successfully updated in '{WORKSHEET_NAME_WORLDWIDE}'!")
+    # Only the rows that changed are sent, keyed on the job link; the tab is never cleared
+    sync = SheetSink(sheet_worldwide, "link").write(filtered_worldwide_df)
+    print(f"✅ Data successfully updated in {sync.summary(WORKSHEET_NAME_WORLDWIDE)}")
+
+# Remember what this run scraped so --only-new runs can skip it
+seen_jobs.commit()
 
 print(f"🏁 Execution finished gracefully. Total time elapsed: {round((time.time() - START_TIME) / 60, 2)} minutes.")
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+# Pass --pipelined to a scraper to fetch job details while its search pages are still being crawled
+PIPELINED_CRAWL = "--pipelined" in sys.argv
+
+# Set by the orchestrator for every scraper it routes: when its slice of the batch's budget starts, and its length
+RUN_STARTED_AT_ENV = "SCRAPER_RUN_STARTED_AT"
+RUN_MAX_SECONDS_ENV = "SCRAPER_RUN_MAX_SECONDS"
+
+
+def run_start_time():
+    """When this run's time budget started: its slice's start when routed by the orchestrator, otherwise now."""
+    return float(os.environ.get(RUN_STARTED_AT_ENV) or time.time())
+
+
+def run_max_duration(default_seconds):
+    """This run's time budget: its slice of the batch when routed by the orchestrator, otherwise `default_seconds`."""
+    return float(os.environ.get(RUN_MAX_SECONDS_ENV) or default_seconds)
+
+
+# ==========================================
+# --- BUDGET CONFIGURATION ---
+# ==========================================
+SHEETS_RESERVE_SECONDS = 15 * 60     # Always left for building the DataFrames and writing Google Sheets
+DEFAULT_SECONDS_PER_DETAIL = 0.5     # Detail throughput assumed until the first pages have been fetched
+DETAIL_SAFETY_FACTOR = 1.5           # Margin on the estimated time needed to drain the queued job links
+
+
+class RunBudget:
+    """
+    Splits a scraper's single deadline between its three phases. The Sheets write always keeps
+    SHEETS_RESERVE_SECONDS; detail fetching may run until that reserve starts; search pages stop
+    early enough that every job link already found can still be fetched, estimated from the
+    detail throughput observed so far in this run.
+    """
+
+    def __init__(self, start_time, max_duration_seconds, sheets_reserve_seconds=SHEETS_RESERVE_SECONDS):
+        self.deadline = start_time + max_duration_seconds
+        self.details_deadline = self.deadline - sheets_reserve_seconds
+        self.details_started_at = None
+        self.details_done = 0
+
+    def record_detail(self):
+        """Counts a fetched job page, feeding the throughput estimate."""
+        if self.details_started_at is None:
+            self.details_started_at = time.time()
+        self.details_done += 1
+
+    def seconds_per_detail(self):
+        elapsed = time.time() - self.details_started_at if self.details_started_at else 0
+        if self.details_done < 10 or elapsed <= 0:
+            return DEFAULT_SECONDS_PER_DETAIL
+        return elapsed / self.details_done
+
+    def search_expired(self, pending_details):
+        """True once crawling more search pages would eat into the time the `pending_details` links need."""
+        needed = pending_details * self.seconds_per_detail() * DETAIL_SAFETY_FACTOR
+        return time.time() + needed >= self.details_deadline
+
+    def details_expired(self):
+        """True once the remaining time is reserved for processing and the Sheets write."""
+        return time.time() >= self.details_deadline
+
+    def summary(self):
+        return (f"Time budget: {self.details_done} job pages fetched at {self.seconds_per_detail():.2f}s each, "
+                f"{max(0, round((self.deadline - time.time()) / 60, 1))} minutes left for processing and Sheets.")
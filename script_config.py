@@ -0,0 +1,32 @@
+import ast
+
+
+def read_script_constants(script_path, *names):
+    """
+    Reads literal module-level assignments (lists, dicts, strings, numbers) from a scraper script
+    without executing it, so shared tools can reuse a script's configuration as the single source of truth.
+    """
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = [target.id for target in node.targets if isinstance(target, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+            targets = [node.target.id]
+        else:
+            continue
+
+        for target in targets:
+            if names and target not in names:
+                continue
+            try:
+                constants[target] = ast.literal_eval(node.value)
+            except ValueError:
+                continue  # Not a literal (computed value), skip it
+
+    missing = [name for name in names if name not in constants]
+    if missing:
+        raise KeyError(f"{script_path} has no literal definition for: {', '.join(missing)}")
+    return constants
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import rate_control
+
+# ==========================================
+# --- CACHE CONFIGURATION ---
+# ==========================================
+# Shared state directory for every scraper; persisted between workflow runs with actions/cache
+CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", ".scraper_cache")
+SEARCH_CACHE_PATH = os.path.join(CACHE_DIR, "linkedin_search.sqlite")
+# Search pages use f_TPR=r86400, so anything older than a few hours is worth re-fetching
+SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL_SECONDS", 6 * 60 * 60))
+
+
+def normalize_search_query(url):
+    """Cache key for a search URL: path plus case-folded, sorted query parameters (keywords, location, f_TPR, start...)."""
+    parts = urlsplit(url)
+    params = sorted(
+        (key.strip().lower(), value.strip().lower())
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    )
+    return f"{parts.path}?{urlencode(params)}"
+
+
+class SearchCache:
+    """SQLite-backed cache of LinkedIn search-result pages shared by every scraper that runs within the TTL."""
+
+    def __init__(self, path=SEARCH_CACHE_PATH, ttl_seconds=SEARCH_CACHE_TTL_SECONDS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # Pipelined crawls call fetch() from a worker thread, one page at a time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS search_pages ("
+            "query_key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        # Expired pages are never served again, drop them so the file stays small
+        self.connection.execute("DELETE FROM search_pages WHERE fetched_at < ?", (time.time() - ttl_seconds,))
+        self.connection.commit()
+
+    def get(self, url):
+        """Returns the cached page body for `url`, or None when it is missing or expired."""
+        row = self.connection.execute(
+            "SELECT body FROM search_pages WHERE query_key = ? AND fetched_at >= ?",
+            (normalize_search_query(url), time.time() - self.ttl_seconds),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, url, body):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO search_pages (query_key, body, fetched_at) VALUES (?, ?, ?)",
+            (normalize_search_query(url), body, time.time()),
+        )
+        self.connection.commit()
+
+    def fetch(self, url, headers=None):
+        """
+        Returns the page body from the cache, or downloads it (paced by rate_control) and caches it.
+        Raises rate_control.ThrottledError when LinkedIn keeps throttling, instead of returning an empty page.
+        """
+        body = self.get(url)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        response = rate_control.get(url, headers=headers)
+        if response.status_code == 200:
+            self.set(url, response.text)
+        return response.text
+
+    def summary(self):
+        return f"Search cache: {self.hits} pages served locally, {self.misses} fetched from LinkedIn."
@@ -0,0 +1,96 @@
+import json
+import os
+from collections import defaultdict
+
+from search_cache import CACHE_DIR
+
+# ==========================================
+# --- PLANNER CONFIGURATION ---
+# ==========================================
+YIELD_SMOOTHING = 0.3          # Weight of the latest run in the moving averages
+MATCH_WEIGHT = 3               # A job that passes the sheet filter is worth this many plain new IDs
+SKIP_AFTER_EMPTY_RUNS = 3      # Consecutive runs returning no job card at all before a query is skipped
+RETRY_SKIPPED_EVERY_RUNS = 7   # Skipped queries are probed again after this many runs, in case they came back to life
+
+
+class SearchPlanner:
+    """
+    Per-(country, keyword, page) yield history of one scraper, kept as JSON in the cache directory.
+    Each run records how many new unique job IDs every search page produced and how many of its jobs
+    passed the sheet filter; the next run visits the most productive pages first, so the ones cut off
+    by the time budget are the least valuable, and stops requesting pages that keep coming back empty.
+    """
+
+    def __init__(self, name, directory=CACHE_DIR):
+        self.path = os.path.join(directory, f"search_yield_{name}.json")
+        self.history = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.history = json.load(f)
+        self.new_ids = {}                          # query key -> new unique IDs this run
+        self.job_ids = defaultdict(set)            # query key -> job IDs it returned this run
+        self.matching_job_ids = set()
+        self.matches_recorded = False
+
+    @staticmethod
+    def _key(query):
+        country, keyword, page = query
+        return f"{country}\t{keyword}\t{page}"
+
+    def expected_value(self, query):
+        """Smoothed value per request; never-searched queries rank first so they get measured."""
+        stats = self.history.get(self._key(query))
+        if stats is None:
+            return float("inf")
+        return stats["avg_new_ids"] + MATCH_WEIGHT * stats["avg_matches"]
+
+    def is_skipped(self, query):
+        stats = self.history.get(self._key(query))
+        return (stats is not None and stats["empty_runs"] >= SKIP_AFTER_EMPTY_RUNS
+                and stats["runs_skipped"] < RETRY_SKIPPED_EVERY_RUNS)
+
+    def plan(self, queries):
+        """Queries worth requesting, best expected value first (ties keep their configured order)."""
+        planned = [query for query in queries if not self.is_skipped(query)]
+        skipped = [query for query in queries if self.is_skipped(query)]
+        for query in skipped:
+            self.history[self._key(query)]["runs_skipped"] += 1
+
+        planned.sort(key=self.expected_value, reverse=True)
+        print(f"🧭 Search plan: {len(planned)} pages ordered by past yield, {len(skipped)} reliably empty pages skipped.")
+        return planned
+
+    def record_search(self, query, job_ids, new_count):
+        """Records the job IDs a search page returned and how many of them were new to this run."""
+        key = self._key(query)
+        self.new_ids[key] = new_count
+        self.job_ids[key].update(job_id for job_id in job_ids if job_id)
+
+    def record_matches(self, matching_job_ids):
+        """Credits every searched page with the jobs it returned that made it into the sheet."""
+        self.matching_job_ids = set(matching_job_ids)
+        self.matches_recorded = True
+
+    def save(self):
+        """Folds this run's yields into the history and writes it atomically."""
+        for key, new_count in self.new_ids.items():
+            stats = self.history.setdefault(key, {
+                "runs": 0, "avg_new_ids": 0.0, "match_runs": 0, "avg_matches": 0.0, "empty_runs": 0, "runs_skipped": 0,
+            })
+            # The first observation seeds the average instead of being smoothed against zero
+            stats["runs"] += 1
+            weight = 1 if stats["runs"] == 1 else YIELD_SMOOTHING
+            stats["avg_new_ids"] += weight * (new_count - stats["avg_new_ids"])
+            if self.matches_recorded:
+                stats["match_runs"] += 1
+                weight = 1 if stats["match_runs"] == 1 else YIELD_SMOOTHING
+                matches = len(self.job_ids[key] & self.matching_job_ids)
+                stats["avg_matches"] += weight * (matches - stats["avg_matches"])
+            stats["empty_runs"] = 0 if self.job_ids[key] else stats["empty_runs"] + 1
+            stats["runs_skipped"] = 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.history, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+from search_cache import CACHE_DIR
+
+# Pass --only-new to a scraper to skip postings an earlier run already scraped
+ONLY_NEW_POSTINGS = "--only-new" in sys.argv
+
+
+class SeenJobsStore:
+    """
+    Job IDs already scraped by one scraper, kept on disk as a sorted int64 .npy array.
+    The file is memory-mapped on load, lookups are binary searches, and new IDs are merged
+    in and written to a temporary file that atomically replaces the old one on commit().
+    """
+
+    def __init__(self, name, directory=CACHE_DIR):
+        self.path = os.path.join(directory, f"seen_job_ids_{name}.npy")
+        if os.path.exists(self.path):
+            self.ids = np.load(self.path, mmap_mode="r")
+        else:
+            self.ids = np.empty(0, dtype=np.int64)
+        self.pending = set()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, job_id):
+        if job_id is None:
+            return False
+        job_id = int(job_id)
+        position = np.searchsorted(self.ids, job_id)
+        return position < len(self.ids) and self.ids[position] == job_id
+
+    def add(self, job_id):
+        """Queues a job ID to be written on the next commit()."""
+        if job_id is not None:
+            self.pending.add(int(job_id))
+
+    def commit(self):
+        """Merges queued IDs into the store and atomically replaces the file on disk."""
+        if not self.pending:
+            return
+        merged = np.union1d(self.ids, np.fromiter(self.pending, dtype=np.int64, count=len(self.pending)))
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, merged)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        self.ids = np.load(self.path, mmap_mode="r")
+        self.pending.clear()
@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+
+from search_cache import CACHE_DIR
+
+
+def _column_letter(column):
+    """1-based column number to its A1 letters (1 -> A, 27 -> AA)."""
+    letters = ""
+    while column:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _row_hash(row):
+    return hashlib.sha1(json.dumps(row, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _contiguous_runs(rows):
+    """Groups sorted row numbers into (first, last) runs of consecutive rows."""
+    runs = []
+    for row in rows:
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return [tuple(run) for run in runs]
+
+
+@dataclass
+class SyncResult:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    api_calls: int = 0
+
+    def summary(self, title):
+        return (f"'{title}': {self.inserted} inserted, {self.updated} updated, {self.deleted} deleted, "
+                f"{self.unchanged} unchanged ({self.api_calls} Sheets API calls).")
+
+
+# ==========================================
+# --- DIFF-BASED SHEET SINK ---
+# ==========================================
+class SheetSink:
+    """
+    Makes a worksheet hold exactly a DataFrame's rows (header in row 1, one row per key) without
+    clearing it. Only the header row and the key column are read back; a local ledger of row hashes
+    from the previous write (kept in the cache directory) tells which kept rows actually changed.
+    Rows whose key disappeared are reused for new keys, changed rows are rewritten in place, and the
+    rest is sent as one batched update, one append and one batched delete, so the sheet is never
+    blank and never limited by a hard-coded range.
+    """
+
+    def __init__(self, worksheet, key_column, value_input_option="RAW", directory=CACHE_DIR):
+        self.worksheet = worksheet
+        self.key_column = key_column
+        self.value_input_option = value_input_option
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", worksheet.title).strip("_").lower()
+        self.ledger_path = os.path.join(directory, f"sheet_rows_{slug}.json")
+
+    def _load_ledger(self, header):
+        if not os.path.exists(self.ledger_path):
+            return {}
+        with open(self.ledger_path, encoding="utf-8") as f:
+            ledger = json.load(f)
+        # A different column layout means every stored hash is meaningless
+        return ledger["rows"] if ledger.get("header") == header else {}
+
+    def _save_ledger(self, header, hashes):
+        os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+        temp_path = self.ledger_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"header": header, "rows": hashes}, f, ensure_ascii=False)
+        os.replace(temp_path, self.ledger_path)
+
+    def write(self, df):
+        """Syncs the worksheet to `df` (keyed on `key_column`) and returns a SyncResult."""
+        result = SyncResult()
+        header = [str(column) for column in df.columns]
+        key_index = header.index(self.key_column)
+        rows = {}
+        for row in df.values.tolist():
+            rows.setdefault(str(row[key_index]), row)  # First occurrence wins, like drop_duplicates
+        hashes = {key: _row_hash(row) for key, row in rows.items()}
+
+        sheet_header = self.worksheet.row_values(1)
+        same_layout = sheet_header == header
+        if same_layout:
+            sheet_keys = self.worksheet.col_values(key_index + 1)[1:]
+            ledger = self._load_ledger(header)
+        else:
+            # New or reshaped tab: every existing data row is rewritten, nothing can be matched on keys
+            sheet_keys = [None] * max(0, len(self.worksheet.col_values(1)) - 1)
+            ledger = {}
+        result.api_calls += 2
+
+        # Keep rows whose key is still wanted (first occurrence only), free every other row
+        kept, free_rows = {}, []
+        for position, key in enumerate(sheet_keys):
+            row_number = position + 2
+            if key in rows and key not in kept:
+                kept[key] = row_number
+            else:
+                free_rows.append(row_number)
+        inserts = [key for key in rows if key not in kept]
+
+        writes = {}  # row number -> values
+        if not same_layout:
+            writes[1] = header
+        for key, row_number in kept.items():
+            if ledger.get(key) == hashes[key]:
+                result.unchanged += 1
+            else:
+                writes[row_number] = rows[key]
+                result.updated += 1
+        reused = min(len(free_rows), len(inserts))
+        for row_number, key in zip(free_rows, inserts):
+            writes[row_number] = rows[key]
+        appended = inserts[reused:]
+        surplus_rows = free_rows[reused:]
+        result.inserted = len(inserts)
+        result.deleted = len(surplus_rows)  # Freed rows reused for inserts are not deletions
+
+        if writes:
+            width = _column_letter(len(header))
+            self.worksheet.batch_update(
+                [
+                    {"range": f"A{first}:{width}{last}", "values": [writes[row] for row in range(first, last + 1)]}
+                    for first, last in _contiguous_runs(sorted(writes))
+                ],
+                value_input_option=self.value_input_option,
+            )
+            result.api_calls += 1
+        if appended:
+            self.worksheet.append_rows(
+                [rows[key] for key in appended], value_input_option=self.value_input_option,
+                insert_data_option="INSERT_ROWS", table_range="A1",
+            )
+            result.api_calls += 1
+        if surplus_rows:
+            # Bottom-up, so earlier deletions do not shift the rows still to delete
+            self.worksheet.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {
+                    "sheetId": self.worksheet.id, "dimension": "ROWS", "startIndex": first - 1, "endIndex": last,
+                }}}
+                for first, last in reversed(_contiguous_runs(surplus_rows))
+            ]})
+            result.api_calls += 1
+
+        self._save_ledger(header, hashes)
+        return result
+
+
+# ==========================================
+# --- APPEND-ONLY DATED LEDGER ---
+# ==========================================
+class DatedAppendSink:
+    """
+    Appends a DataFrame's rows to a history tab (one block of rows per date) at a constant cost:
+    only the header row and the Date cell of the last row are read. A date already in the last
+    row, or in a local ledger of appended dates in the cache directory, is not appended again, so
+    a re-run on the same day adds nothing even when the cache was evicted.
+    """
+
+    def __init__(self, worksheet, date_column="Date", value_input_option="RAW", directory=CACHE_DIR):
+        self.worksheet = worksheet
+        self.date_column = date_column
+        self.value_input_option = value_input_option
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", worksheet.title).strip("_").lower()
+        self.ledger_path = os.path.join(directory, f"sheet_dates_{slug}.json")
+
+    def _load_dates(self):
+        if not os.path.exists(self.ledger_path):
+            return set()
+        with open(self.ledger_path, encoding="utf-8") as f:
+            return set(json.load(f))
+
+    def _save_dates(self, dates):
+        os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+        temp_path = self.ledger_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(dates), f)
+        os.replace(temp_path, self.ledger_path)
+
+    def _last_date(self, date_column_number):
+        """Date of the tab's last row (None if it has no data rows), from a one-cell read."""
+        last_row = self.worksheet.row_count
+        if last_row <= 1:
+            return None
+        cell = self.worksheet.get(f"{_column_letter(date_column_number)}{last_row}")
+        if cell and cell[0]:
+            return str(cell[0][0])
+        # Blank grid rows below the data (e.g. a tab created with 1000 rows): read the column once and
+        # trim them, so appends grow the grid and the last row is the last record from then on
+        dates = self.worksheet.col_values(date_column_number)
+        self.worksheet.resize(rows=max(len(dates), 1))
+        return str(dates[-1]) if len(dates) > 1 else None
+
+    def write(self, df):
+        """Appends the rows of every date not appended yet. Returns the number of rows appended."""
+        header = [str(column) for column in df.columns]
+        appended_dates = self._load_dates()
+
+        sheet_header = self.worksheet.row_values(1)
+        if sheet_header != header:
+            if sheet_header:
+                # Same as before: a tab with another layout starts over, and so does its ledger
+                self.worksheet.clear()
+            appended_dates = set()
+            self.worksheet.batch_update([{"range": f"A1:{_column_letter(len(header))}1", "values": [header]}],
+                                        value_input_option=self.value_input_option)
+            self.worksheet.resize(rows=1)  # No blank rows under the header, so the last row is always the last record
+        else:
+            last_date = self._last_date(header.index(self.date_column) + 1)
+            if last_date is not None:
+                appended_dates.add(last_date)
+
+        new_rows = df[~df[self.date_column].astype(str).isin(appended_dates)]
+        if not new_rows.empty:
+            self.worksheet.append_rows(new_rows.values.tolist(), value_input_option=self.value_input_option,
+                                       insert_data_option="INSERT_ROWS", table_range="A1")
+        self._save_dates(appended_dates | set(df[self.date_column].astype(str)))
+        return len(new_rows)
+
+
+# ==========================================
+# --- OFFLINE FAKE ---
+# ==========================================
+class FakeSpreadsheet:
+    def __init__(self):
+        self.worksheets = {}
+
+    def batch_update(self, body):
+        for request in body["requests"]:
+            target = request["deleteDimension"]["range"]
+            worksheet = self.worksheets[target["sheetId"]]
+            del worksheet.rows[target["startIndex"]:target["endIndex"]]
+            worksheet.calls.append("delete_rows")
+
+
+class FakeWorksheet:
+    """
+    In-memory stand-in for the parts of gspread.Worksheet SheetSink uses, so syncs can be checked
+    offline: `rows` holds the cell values and `calls` the API methods used.
+    """
+
+    def __init__(self, title="Fake", rows=None, spreadsheet=None):
+        self.title = title
+        self.rows = [list(row) for row in rows or []]
+        self.calls = []
+        self.spreadsheet = spreadsheet or FakeSpreadsheet()
+        self.id = len(self.spreadsheet.worksheets)
+        self.spreadsheet.worksheets[self.id] = self
+
+    def clear(self):
+        self.calls.append("clear")
+        self.rows = []
+
+    def row_values(self, row):
+        self.calls.append("row_values")
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self.calls.append("col_values")
+        values = [row[col - 1] if col <= len(row) else "" for row in self.rows]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def batch_update(self, data, value_input_option="RAW"):
+        self.calls.append("batch_update")
+        for entry in data:
+            first = int(re.match(r"[A-Z]+(\d+)", entry["range"]).group(1))
+            for offset, values in enumerate(entry["values"]):
+                while len(self.rows) < first + offset:
+                    self.rows.append([])
+                self.rows[first + offset - 1] = list(values)
+
+    def append_rows(self, values, value_input_option="RAW", insert_data_option=None, table_range=None):
+        self.calls.append("append_rows")
+        self.rows.extend(list(row) for row in values)
+
+    def get_all_values(self):
+        return [list(row) for row in self.rows]
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def resize(self, rows):
+        self.calls.append("resize")
+        self.rows = (self.rows + [[] for _ in range(rows)])[:rows]
+
+    def get(self, range_name):
+        self.calls.append("get")
+        bounds = re.findall(r"([A-Z]+)(\d+)", range_name)
+        (first_col, first), (last_col, last) = bounds[0], bounds[-1]
+
+        def number(letters):
+            return sum((ord(letter) - 64) * 26 ** power for power, letter in enumerate(reversed(letters)))
+
+        return [list(row[number(first_col) - 1:number(last_col)]) for row in self.rows[int(first) - 1:int(last)]]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import pandas as pd
+
+    # Offline self-check: python sheet_sink.py
+    columns = ["Date", "title", "link"]
+    old = pd.DataFrame([["d1", "a", "L1"], ["d1", "b", "L2"], ["d1", "c", "L3"], ["d1", "d", "L4"]], columns=columns)
+    new = pd.DataFrame([["d2", "b", "L2"], ["d1", "d", "L4"], ["d2", "e", "L5"], ["d2", "f", "L6"], ["d2", "g", "L7"]],
+                       columns=columns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        worksheet = FakeWorksheet("Linkedin Worldwide")
+        sink = SheetSink(worksheet, "link", directory=directory)
+        print(sink.write(old).summary(worksheet.title))
+        changed = sink.write(new)
+        print(changed.summary(worksheet.title))
+        # L1 and L3 are freed and both reused for new keys, so nothing is deleted
+        assert (changed.inserted, changed.deleted) == (3, 0), changed
+        print(sink.write(new).summary(worksheet.title))
+        shrunk = sink.write(new.head(2))
+        assert (shrunk.inserted, shrunk.deleted) == (0, 3), shrunk
+        sink.write(new)
+
+        written = sorted(map(tuple, worksheet.get_all_values()[1:]))
+        expected = sorted(map(tuple, new.values.tolist()))
+        assert worksheet.get_all_values()[0] == columns and written == expected, worksheet.get_all_values()
+        print("✅ Sheet holds exactly the new rows.")
+
+        counts = pd.DataFrame([["d1", "python", 3], ["d1", "sql", 1]], columns=["Date", "Skill", "Count"])
+        history = FakeWorksheet("Count Skills")
+        ledger = DatedAppendSink(history, directory=directory)
+        appended = [ledger.write(counts), ledger.write(counts), ledger.write(counts.assign(Date="d2"))]
+        assert appended == [2, 0, 2] and len(history.rows) == 5, (appended, history.rows)
+        # A same-day re-run after the cache (and its ledger) was evicted, on a tab padded with blank rows
+        os.remove(ledger.ledger_path)
+        history.rows.extend([] for _ in range(3))
+        assert ledger.write(counts.assign(Date="d2")) == 0 and len(history.rows) == 5, history.rows
+        assert ledger.write(counts.assign(Date="d3")) == 2 and history.get("A7:A7") == [["d3"]], history.rows
+        print("✅ Dated ledger appends each date once.")
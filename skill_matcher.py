@@ -0,0 +1,114 @@
+import re
+
+
+def _trie_pattern(words):
+    """Builds a regex alternation that shares common prefixes, so the engine branches once per character."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End-of-word marker
+
+    def render(node):
+        if "" in node and len(node) == 1:
+            return ""
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return render(trie)
+
+
+class SkillMatcher:
+    """
+    Finds every skill from a {tag: [skills]} mapping in a description with a single regex scan.
+    A prefix-shared scanner locates the positions where some skill starts, and each candidate is
+    then confirmed with the same whole-word, case-insensitive pattern the original per-skill loop used,
+    so the matched set is identical to running re.search once per skill.
+    """
+
+    def __init__(self, skill_categories):
+        self.skill_to_tag = {}
+        for tag, skills in skill_categories.items():
+            for skill in skills:
+                self.skill_to_tag[skill] = tag  # Last category wins, same as the Count Skills map
+        self.skills = list(self.skill_to_tag)
+
+        self.patterns = {
+            skill: re.compile(r'\b' + re.escape(skill) + r'\b', flags=re.IGNORECASE)
+            for skill in self.skills
+        }
+
+        # Candidates to confirm at a position, bucketed by the (lowercased) first character
+        self.candidates = {}
+        for skill in self.skills:
+            self.candidates.setdefault(skill[0].lower(), []).append((skill, self.patterns[skill]))
+        self.all_candidates = list(self.patterns.items())
+
+        words = sorted({skill.lower() for skill in self.skills})
+        self.scanner = re.compile(r'\b(?=' + _trie_pattern(words) + r'\b)', flags=re.IGNORECASE)
+
+    def find_skills(self, text):
+        """Returns the set of skills that appear as whole words in `text`."""
+        found = set()
+        for match in self.scanner.finditer(text):
+            pos = match.start()
+            for skill, pattern in self.candidates.get(text[pos].lower(), self.all_candidates):
+                if skill not in found and pattern.match(text, pos):
+                    found.add(skill)
+        return found
+
+    def find(self, text):
+        """Returns a sorted list of (skill, tag) pairs found in `text`."""
+        return sorted((skill, self.skill_to_tag[skill]) for skill in self.find_skills(text))
+
+    def count(self, descriptions):
+        """Counts, for every skill, how many descriptions mention it at least once."""
+        counts = dict.fromkeys(self.skills, 0)
+        for description in descriptions:
+            for skill in self.find_skills(description):
+                counts[skill] += 1
+        return counts
+
+
+# ==========================================
+# --- BENCHMARK AGAINST THE PER-SKILL LOOP ---
+# ==========================================
+if __name__ == "__main__":
+    import random
+    import time
+    from script_config import read_script_constants
+
+    skill_categories = read_script_constants("app.py", "skill_categories")["skill_categories"]
+    skills = list({skill for tag_skills in skill_categories.values() for skill in tag_skills})
+
+    random.seed(42)
+    filler = ("we are looking for a motivated engineer to join our team and build reliable "
+              "systems with modern tooling across data platforms and customer workflows").split()
+    descriptions = []
+    for _ in range(1000):
+        words = random.choices(filler, k=400) + random.sample(skills, 12)
+        random.shuffle(words)
+        descriptions.append(" ".join(words))
+
+    start = time.perf_counter()
+    loop_counts = {skill: 0 for skill in skills}
+    for description in descriptions:
+        for skill in skills:
+            if re.search(r'\b' + re.escape(skill) + r'\b', description, flags=re.IGNORECASE):
+                loop_counts[skill] += 1
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = SkillMatcher(skill_categories)
+    matcher_counts = matcher.count(descriptions)
+    matcher_seconds = time.perf_counter() - start
+
+    assert matcher_counts == loop_counts, "SkillMatcher counts differ from the per-skill regex loop"
+    print(f"{len(descriptions)} descriptions x {len(skills)} skills")
+    print(f"Per-skill re.search loop : {loop_seconds:.3f}s")
+    print(f"SkillMatcher (incl. build): {matcher_seconds:.3f}s  ({loop_seconds / matcher_seconds:.1f}x faster)")
+    print("✅ Counts identical")
@@ -0,0 +1,207 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# --- TREND CONFIGURATION ---
+# ==========================================
+WORKSHEET_NAME_COUNT_SKILLS = 'Count Skills'
+WORKSHEET_NAME_TRENDS = 'Skill Trends'
+ROLLING_DAYS = 7
+LONG_ROLLING_DAYS = 28
+TOP_MOVERS = 10
+HISTORY_CHUNK_ROWS = 2000   # Count Skills rows read per request, from the bottom of the tab up
+
+
+class SkillTrendMatrix:
+    """
+    Dense date x skill matrix of daily counts (one row per calendar day, NaN on days without a run),
+    with every trend computed as whole-array NumPy operations instead of per-skill loops.
+    """
+
+    def __init__(self, history):
+        """`history` is a non-empty (Date, Tag, Skill, Count) DataFrame, as kept in the Count Skills tab."""
+        history = history.dropna(subset=["Date", "Skill"])
+        days = pd.to_datetime(history["Date"]).values.astype("datetime64[D]")
+        skills, skill_index = np.unique(history["Skill"].astype(str).values, return_inverse=True)
+        self.skills = skills
+        self.dates = np.arange(days.min(), days.max() + 1)
+        self.counts = np.full((len(self.dates), len(skills)), np.nan)
+        # A skill counted twice on the same day keeps its last count
+        day_index = (days - days.min()).astype(int)
+        self.counts[day_index, skill_index] = pd.to_numeric(history["Count"], errors="coerce").values
+
+        # Most recent tag wins: each skill's last row in date order (ties keep the sheet's row order)
+        latest_first = np.argsort(days, kind="stable")[::-1]
+        _, latest_rows = np.unique(skill_index[latest_first], return_index=True)
+        self.tags = history["Tag"].astype(str).values[latest_first[latest_rows]].astype(object)
+        self.tag_names, self.tag_index = np.unique(self.tags.astype(str), return_inverse=True)
+
+    def rolling_mean(self, days=ROLLING_DAYS):
+        """Trailing mean over `days` calendar days (shorter at the start), ignoring days without a run."""
+        observed = ~np.isnan(self.counts)
+        padding = np.zeros((1, len(self.skills)))
+        value_sums = np.vstack([padding, np.cumsum(np.where(observed, self.counts, 0.0), axis=0)])
+        run_counts = np.vstack([padding, np.cumsum(observed, axis=0)])
+        window_end = np.arange(1, len(self.dates) + 1)
+        window_start = np.maximum(window_end - days, 0)
+        window_sums = value_sums[window_end] - value_sums[window_start]
+        window_runs = run_counts[window_end] - run_counts[window_start]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(window_runs > 0, window_sums / window_runs, np.nan)
+
+    def week_over_week(self, days=ROLLING_DAYS):
+        """(current window mean, previous window mean, growth ratio) per skill, as of the latest day."""
+        means = self.rolling_mean(days)
+        current = means[-1]
+        previous = means[-1 - days] if len(means) > days else np.full(len(self.skills), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth = np.where(previous > 0, (current - previous) / previous, np.nan)
+        return current, previous, growth
+
+    def tag_rollup(self, values):
+        """Sums per-skill columns (dates x skills, or one row per skill) into per-tag columns."""
+        membership = np.zeros((len(self.skills), len(self.tag_names)))
+        membership[np.arange(len(self.skills)), self.tag_index] = 1.0
+        return np.nan_to_num(values) @ membership
+
+    def summary(self, top_movers=TOP_MOVERS):
+        """Compact trend table: one row per skill and per tag, biggest week-over-week movers first."""
+        latest = self.counts[-1]
+        current, previous, growth = self.week_over_week()
+        long_mean = self.rolling_mean(LONG_ROLLING_DAYS)[-1]
+        as_of = str(self.dates[-1])
+
+        skill_rows = pd.DataFrame({
+            "Name": self.skills,
+            "Level": "Skill",
+            "Tag": self.tags.astype(str),
+            "Latest": latest,
+            f"Avg {ROLLING_DAYS}d": current,
+            f"Avg prev {ROLLING_DAYS}d": previous,
+            "WoW %": growth * 100,
+            f"Avg {LONG_ROLLING_DAYS}d": long_mean,
+        })
+        tag_current = self.tag_rollup(current)
+        tag_previous = self.tag_rollup(previous)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            tag_growth = np.where(tag_previous > 0, (tag_current - tag_previous) / tag_previous, np.nan)
+        tag_rows = pd.DataFrame({
+            "Name": [f"[Tag] {tag}" for tag in self.tag_names],
+            "Level": "Tag",
+            "Tag": self.tag_names,
+            "Latest": self.tag_rollup(latest),
+            f"Avg {ROLLING_DAYS}d": tag_current,
+            f"Avg prev {ROLLING_DAYS}d": tag_previous,
+            "WoW %": tag_growth * 100,
+            f"Avg {LONG_ROLLING_DAYS}d": self.tag_rollup(long_mean),
+        })
+
+        # Movers ranked on absolute change of the weekly mean, so tiny bases do not dominate
+        change = np.nan_to_num(current - previous)
+        order = np.argsort(-np.abs(change), kind="stable")
+        skill_rows["Mover rank"] = ""
+        skill_rows.loc[order[:top_movers], "Mover rank"] = [str(rank) for rank in range(1, min(top_movers, len(order)) + 1)]
+        skill_rows = skill_rows.iloc[order]
+        tag_rows["Mover rank"] = ""
+
+        table = pd.concat([tag_rows, skill_rows], ignore_index=True)
+        table.insert(0, "As of", as_of)
+        numeric = table.columns[table.dtypes.apply(lambda dtype: np.issubdtype(dtype, np.number))]
+        table[numeric] = table[numeric].round(1)
+        return table.astype(object).where(table.notna(), "")
+
+
+# ==========================================
+# --- HISTORY SOURCES ---
+# ==========================================
+def load_count_skills_sheet(worksheet, days=LONG_ROLLING_DAYS):
+    """
+    The last `days` days of Count Skills history (every trend only looks that far back). The tab
+    only grows at the bottom, so it is read upwards in blocks of HISTORY_CHUNK_ROWS rows until a
+    block reaches past the window, instead of downloading every day since the tab was created.
+    """
+    header = worksheet.row_values(1)
+    if not header:
+        return pd.DataFrame(columns=["Date", "Tag", "Skill", "Count"])
+    last_column = chr(ord("A") + len(header) - 1)  # Date, Tag, Skill, Count
+    date_column = header.index("Date")
+
+    rows, cutoff = [], None
+    end = worksheet.row_count
+    while end >= 2:
+        start = max(2, end - HISTORY_CHUNK_ROWS + 1)
+        # Blank rows left at the bottom of the grid come back empty or short
+        block = [row + [""] * (len(header) - len(row)) for row in worksheet.get(f"A{start}:{last_column}{end}") if any(row)]
+        rows = block + rows
+        end = start - 1
+        dates = [row[date_column] for row in block if row[date_column]]
+        if dates and cutoff is None:
+            cutoff = str((pd.Timestamp(max(dates)) - pd.Timedelta(days=days - 1)).date())
+        if dates and min(dates) < cutoff:
+            break
+
+    history = pd.DataFrame(rows, columns=header)
+    return history[history["Date"] >= cutoff].reset_index(drop=True) if cutoff else history
+
+
+def count_skills_from_archive(skill_categories, since=None, source="app"):
+    """Rebuilds the same (Date, Tag, Skill, Count) history from the local posting archive."""
+    from posting_archive import load_postings
+    from skill_matcher import SkillMatcher
+
+    postings = load_postings(since=since, sources=[source], columns=["date", "description"])
+    matcher = SkillMatcher(skill_categories)
+    rows = []
+    for date, descriptions in postings.groupby("date")["description"]:
+        for skill, count in matcher.count(descriptions.fillna("")).items():
+            rows.append({"Date": date, "Tag": matcher.skill_to_tag[skill], "Skill": skill, "Count": count})
+    return pd.DataFrame(rows, columns=["Date", "Tag", "Skill", "Count"])
+
+
+# ==========================================
+# --- DAILY TREND REPORT ---
+# ==========================================
+if __name__ == "__main__":
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    from sheet_sink import SheetSink
+
+    # Usage: python skill_trends.py [--archive]   (history from the local archive instead of the Count Skills tab)
+    service_account_info = json.loads(os.environ["GOOGLE_SERVICE_ACCOUNT"])
+    SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    credentials = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+    client = gspread.authorize(credentials)
+    spreadsheet = client.open_by_url(os.environ["SPREADSHEET_URL"])
+
+    if "--archive" in sys.argv:
+        from script_config import read_script_constants
+
+        skill_categories = read_script_constants(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                                                 "skill_categories")["skill_categories"]
+        history = count_skills_from_archive(skill_categories)
+    else:
+        history = load_count_skills_sheet(spreadsheet.worksheet(WORKSHEET_NAME_COUNT_SKILLS))
+
+    if history.empty:
+        print("❌ No skill count history yet, nothing to summarise.")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    trends = SkillTrendMatrix(history)
+    summary = trends.summary()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"📈 {len(trends.dates)} days x {len(trends.skills)} skills summarised in {elapsed_ms:.1f} ms.")
+    print(summary.head(len(trends.tag_names) + TOP_MOVERS).to_string(index=False))
+
+    try:
+        worksheet = spreadsheet.worksheet(WORKSHEET_NAME_TRENDS)
+    except gspread.WorksheetNotFound:
+        worksheet = spreadsheet.add_worksheet(title=WORKSHEET_NAME_TRENDS, rows="1000", cols="20")
+    sync = SheetSink(worksheet, "Name").write(summary)
+    print(f"✅ Trend summary updated in {sync.summary(WORKSHEET_NAME_TRENDS)}")
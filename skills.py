@@ -1,18 +1,23 @@
 import time
-import requests
 from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
+from frame_filters import drop_matching
+from job_index import JobIndex
+from search_cache import SearchCache
+from linkedin_fetch import fetch_job_details
+from posting_archive import archive_postings
+from rate_control import RATE_CONTROLLER
+from run_budget import run_max_duration, run_start_time
 
 
 # ==========================================
 # --- TIME TRACKING CONFIGURATION (SAFEGUARD) ---
 # ==========================================
-START_TIME = time.time()
-MAX_DURATION_SECONDS = 21000 
+START_TIME = run_start_time()  # Start of this script's slice of the batch when routed by the orchestrator
+MAX_DURATION_SECONDS = run_max_duration(21000)
 
 def has_time_expired():
     """Returns True if the script has been running for more than 5.5 hours."""
@@ -32,6 +37,10 @@ countries = [
     "Switzerland", "Denmark", "Finland", "Sweden", "Norway", "Ireland","United States"
 ]
 
+# LinkedIn guest search endpoint and how many 25-result pages are read per search
+SEARCH_URL_TEMPLATE = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=Remote&{keyword}&location={country}&f_TPR=r86400&start={start}"
+PAGES_PER_SEARCH = 6
+
 excluded_countries = ["India", "Pakistan", "Philippines", "Israel", "Vietnam"]
 
 keywords_for_scraping = [ "Forward Deployed Engineer", "FDE", "Forward AI"]
@@ -46,8 +55,8 @@ keywords_for_scraping = [ "Forward Deployed Engineer", "FDE", "Forward AI"]
 # ==========================================
 # --- STEP 1 — SCRAPE JOB LINKS ---
 # ==========================================
-links = []
-api_url_job = []
+search_cache = SearchCache()
+job_index = JobIndex() # Dedups search hits on the numeric job ID and keeps every keyword that found them
 break_step1 = False
 
 print("🚀 Starting Step 1: Scraping job links...")
@@ -57,7 +66,7 @@ for country in countries:
     for keyword in keywords_for_scraping:
         if break_step1:
             break
-        for i in range(0, 6):  
+        for i in range(0, PAGES_PER_SEARCH):
             
             # --- Safetime Check ---
             if has_time_expired():
@@ -65,28 +74,26 @@ for country in countries:
                 break_step1 = True
                 break
 
-            url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=Remote&{keyword}&location={country}&f_TPR=r86400&start={i*25}"
+            url = SEARCH_URL_TEMPLATE.format(keyword=keyword, country=country, start=i*25)
             headers = {"User-Agent": "Mozilla/5.0"}
 
-            time.sleep(1)
             try:
-                response = requests.get(url, headers=headers)
-                soup = BeautifulSoup(response.text, "html.parser")
+                # Served from the shared on-disk cache when another scraper fetched this page recently
+                page_html = search_cache.fetch(url, headers=headers)
+                soup = BeautifulSoup(page_html, "html.parser")
                 job_links = soup.find_all("a", class_="base-card__full-link")
 
                 for job in job_links:
                     job_url = job.get("href")
-                    if job_url and job_url not in [link[0] for link in links]: 
-                        links.append((job_url, keyword))
-                        match = re.search(r'-([0-9]+)\?', job_url)
-                        if match:
-                            job_id = match.group(1)
-                            api_link = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-                            api_url_job.append(api_link)
+                    if job_url:
+                        job_index.add(job_url, keyword)
             except Exception as e:
                 print(f"Error fetching search page: {e}")
 
+links = job_index.links()
+api_url_job = job_index.api_urls()
 print(f"Total unique job links found: {len(links)}")
+print(search_cache.summary())
 
 # ==========================================
 # --- STEP 2 — SCRAPE JOB DETAILS ---
@@ -95,46 +102,28 @@ all_job_data = []
 headers = {"User-Agent": "Mozilla/5.0"}
 
 print("🚀 Starting Step 2: Scraping specific job profiles...")
-for link, searched_keyword in links:
-    
-    # --- Safetime Check ---
-    if has_time_expired():
-        print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Activating fallback script to process existing ({len(all_job_data)}) records.")
-        break
-
-    try:
-        time.sleep(1)
-        response = requests.get(link, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title_tag = soup.find('h1', class_='top-card-layout__title') or soup.find('h2', class_='top-card-layout__title')
-        title = title_tag.text.strip() if title_tag else "Not Found"
+# Pages are fetched concurrently; workers stop picking up new links once the safeguard fires
+details_by_link = fetch_job_details([link for link, _ in links], should_stop=has_time_expired)
+print(RATE_CONTROLLER.summary())
 
-        company_tag = soup.find('a', class_='topcard__org-name-link')
-        company = company_tag.text.strip() if company_tag else "Not Found"
+# --- Safetime Check ---
+if has_time_expired():
+    print(f"⚠️ Reached the 5.5 hours benchmark during Step 2. Activating fallback script to process existing ({len(details_by_link)}) records.")
 
-        country_tag = soup.find('span', class_='topcard__flavor--bullet')
-        country = country_tag.text.strip() if country_tag else "Not Found"
-
-        desc_tag = soup.find('div', class_='description__text--rich')
-        desc = desc_tag.text.strip() if desc_tag else "Not Found"
-
-        # Skip excluded countries
-        if any(excluded.lower() in country.lower() for excluded in excluded_countries):
-            continue
-
-        all_job_data.append({
-            "Date": today_date_str,
-            "title": title,
-            "company": company,
-            "country": country,
-            "link": link,
-            "searched_keyword": searched_keyword,
-            "description": desc 
-        })
+for link, searched_keyword in links:
+    details = details_by_link.get(link)
+    if details is None:
+        continue
 
-    except Exception as e:
-        print(f"Error scraping details for {link}: {e}")
+    all_job_data.append({
+        "Date": today_date_str,
+        "title": details.title,
+        "company": details.company,
+        "country": details.country,
+        "link": link,
+        "searched_keyword": searched_keyword,
+        "description": details.description
+    })
 
 
 
@@ -144,8 +133,11 @@ for link, searched_keyword in links:
 # ==========================================
 import os
 
-# Convert list of dictionaries to DataFrame
-df = pd.DataFrame(all_job_data)
+# Convert list of dictionaries to DataFrame, skipping excluded countries in one vectorized pass
+df = drop_matching(pd.DataFrame(all_job_data), "country", excluded_countries)
+# Keep every raw record in the local columnar archive
+if not df.empty:
+    archive_postings(df, "skills", today_date_str)
 
 # Save as Excel directly in the main path
 
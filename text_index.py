@@ -0,0 +1,375 @@
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from posting_archive import ARCHIVE_DIR
+from search_cache import CACHE_DIR
+
+# ==========================================
+# --- INDEX CONFIGURATION ---
+# ==========================================
+INDEX_DIR = os.path.join(CACHE_DIR, "text_index")
+INDEX_FORMAT = 2   # Bumped when the on-disk layout changes; an index in another format is rebuilt
+MERGE_FACTOR = 4   # This many adjacent segments of about the same size level are merged into one
+MIN_MERGE_POSTINGS = 1 << 20   # Smaller segments all count as this size, so small daily segments merge early
+LEVEL_SPAN = 0.75  # Segments within this many levels of the largest remaining one share its level
+TOKEN_PATTERN = re.compile(r"\w[\w+#]*(?:\.\w+)*")   # Keeps c++, c#, node.js and asp.net as single terms
+QUERY_PATTERN = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def tokenize(text):
+    """Case-folded terms of a text, in order."""
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+def _pair_keys(first, second):
+    """Key of a pair of adjacent term IDs: both packed into one int64, above every single term ID."""
+    return ((first + 1) << 32) | second
+
+
+def _doc_term_keys(text, term_ids):
+    """
+    Keys of every term and every adjacent pair of terms of a description (pairs answer phrase
+    queries). New terms are added to the `term_ids` vocabulary; pairs need no entry of their own.
+    """
+    ids = np.array([term_ids.setdefault(token, len(term_ids)) for token in tokenize(text)], dtype=np.int64)
+    return np.unique(np.concatenate([ids, _pair_keys(ids[:-1], ids[1:])]))
+
+
+def _encode(term_keys, doc_ids):
+    """
+    Builds a segment from parallel (term key, doc ID) arrays: sorted unique term keys, offsets into
+    the postings, and postings stored as sorted doc IDs delta-encoded within each term.
+    """
+    order = np.lexsort((doc_ids, term_keys))
+    term_keys, doc_ids = term_keys[order], doc_ids[order].astype(np.uint32)
+    terms = np.unique(term_keys)
+    offsets = np.append(np.searchsorted(term_keys, terms), len(term_keys))
+    deltas = np.diff(doc_ids, prepend=np.uint32(0))
+    deltas[offsets[:-1]] = doc_ids[offsets[:-1]]  # Every term is non-empty, so each offset starts a posting list
+    return {"terms": terms, "offsets": offsets.astype(np.int64), "deltas": deltas}
+
+
+def _decode(segment):
+    """(term key, doc ID) arrays of a whole segment, the inverse of _encode."""
+    offsets, deltas = segment["offsets"], segment["deltas"].astype(np.int64)
+    lengths = np.diff(offsets)
+    running = np.cumsum(deltas)
+    # Each term restarts from an absolute ID, so subtract the running total before its first posting
+    bases = running[offsets[:-1]] - deltas[offsets[:-1]]
+    return np.repeat(segment["terms"], lengths), running - np.repeat(bases, lengths)
+
+
+def _level(segment):
+    """Size level of a segment: log_MERGE_FACTOR of its number of postings, floored at MIN_MERGE_POSTINGS."""
+    return np.log(max(len(segment["deltas"]), MIN_MERGE_POSTINGS)) / np.log(MERGE_FACTOR)
+
+
+def _merge_start(levels):
+    """
+    Position of the first MERGE_FACTOR adjacent segments to merge, or None. From the left, the
+    segments up to the last one within LEVEL_SPAN of the largest remaining level form one level
+    (smaller stragglers between them included); a level holding MERGE_FACTOR segments is merged.
+    """
+    start = 0
+    while start < len(levels):
+        bottom = max(levels[start:]) - LEVEL_SPAN
+        end = max(position for position in range(start, len(levels)) if levels[position] >= bottom) + 1
+        if end - start >= MERGE_FACTOR:
+            return start
+        start = end
+    return None
+
+
+def _partition_signature(path):
+    """Size and row count of a partition file; unlike its mtime, these survive a fresh checkout of the archive."""
+    import pyarrow.parquet as pq
+
+    return f"{os.path.getsize(path)}:{pq.ParquetFile(path).metadata.num_rows}"
+
+
+class TextIndex:
+    """
+    On-disk inverted index over the descriptions kept in the posting archive. Terms are mapped to
+    integer IDs by a vocabulary kept next to the manifest, and adjacent term pairs to both IDs
+    packed into one int64 key. Each update indexes the archive partitions that are new or changed
+    since the last one as a new segment (one compressed .npz of sorted, delta-encoded doc ID arrays
+    per term key); a job link is indexed once, on the first date it was archived. Adjacent
+    segments of about the same size level are merged MERGE_FACTOR at a time, so a merge rewrites
+    only segments of similar size, never the whole history. Queries read the postings of their
+    terms only and combine them with NumPy set operations, then filter on the per-document date
+    and country arrays.
+
+    Query syntax: words are ANDed, `OR` and `NOT` (or a leading `-`) combine them, parentheses
+    group, and "quoted phrases" match descriptions containing every adjacent word pair of the phrase.
+    """
+
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.vocabulary_path = os.path.join(directory, "vocabulary.json")
+        self.manifest = {"format": INDEX_FORMAT, "links": [], "countries": [], "partitions": {},
+                         "segments": [], "vocabulary_size": 0}
+        self.dates = np.zeros(0, dtype=np.int32)      # Days since 1970-01-01, per doc ID
+        self.countries = np.zeros(0, dtype=np.int32)  # Index into manifest["countries"], per doc ID
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") == INDEX_FORMAT:  # Older layouts are rebuilt from the archive
+                self.manifest = manifest
+                with np.load(os.path.join(directory, "docs.npz")) as docs:
+                    self.dates, self.countries = docs["dates"], docs["countries"]
+        self.segments = {}
+        self._term_ids = None
+
+    def __len__(self):
+        return len(self.manifest["links"])
+
+    @property
+    def term_ids(self):
+        """Term -> term ID, loaded on first use (only the IDs the manifest covers)."""
+        if self._term_ids is None:
+            terms = []
+            if self.manifest["vocabulary_size"]:
+                with open(self.vocabulary_path, encoding="utf-8") as f:
+                    terms = json.load(f)[:self.manifest["vocabulary_size"]]
+            self._term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        return self._term_ids
+
+    def _segment(self, name):
+        if name not in self.segments:
+            with np.load(os.path.join(self.directory, name)) as segment:
+                self.segments[name] = {key: segment[key] for key in ("terms", "offsets", "deltas")}
+        return self.segments[name]
+
+    def _write_segment(self, name, segment):
+        temp_path = os.path.join(self.directory, name + ".tmp.npz")
+        np.savez_compressed(temp_path, **segment)
+        os.replace(temp_path, os.path.join(self.directory, name))
+        self.segments[name] = segment
+
+    def _save(self):
+        # The vocabulary only grows, so readers of the previous manifest still find their IDs in it
+        if len(self.term_ids) != self.manifest["vocabulary_size"]:
+            temp_path = self.vocabulary_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.term_ids), f, ensure_ascii=False)
+            os.replace(temp_path, self.vocabulary_path)
+            self.manifest["vocabulary_size"] = len(self.term_ids)
+        temp_path = os.path.join(self.directory, "docs.tmp.npz")
+        np.savez(temp_path, dates=self.dates, countries=self.countries)
+        os.replace(temp_path, os.path.join(self.directory, "docs.npz"))
+        # The manifest goes last: until it is replaced, readers keep using the previous segments
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    # ------------------------------------------
+    # Building
+    # ------------------------------------------
+    def update(self, archive_dir=ARCHIVE_DIR):
+        """Indexes archive partitions added or rewritten since the last update. Returns the number of new docs."""
+        import pyarrow.parquet as pq
+
+        changed = []
+        if os.path.isdir(archive_dir):
+            for root, _, names in os.walk(archive_dir):
+                if "postings.parquet" in names:
+                    path = os.path.join(root, "postings.parquet")
+                    partition = os.path.relpath(root, archive_dir).replace(os.sep, "/")
+                    signature = _partition_signature(path)
+                    if self.manifest["partitions"].get(partition) != signature:
+                        changed.append((partition, path, signature))
+        if not changed:
+            return 0
+
+        known_links = set(self.manifest["links"])
+        country_ids = {country: position for position, country in enumerate(self.manifest["countries"])}
+        term_ids = self.term_ids
+        first_doc = len(self)
+        new_dates, new_countries, doc_term_keys, doc_ids = [], [], [], []
+        for partition, path, signature in sorted(changed):
+            day = (np.datetime64(re.search(r"date=([\d-]+)", partition).group(1), "D") - EPOCH).astype(int)
+            table = pq.read_table(path, columns=["link", "country", "description"]).to_pydict()
+            for link, country, description in zip(table["link"], table["country"], table["description"]):
+                if not link or not description or link in known_links:
+                    continue
+                known_links.add(link)
+                doc_id = len(self.manifest["links"])
+                self.manifest["links"].append(link)
+                new_dates.append(day)
+                new_countries.append(country_ids.setdefault(country or "", len(country_ids)))
+                doc_term_keys.append(_doc_term_keys(description, term_ids))
+                doc_ids.append(np.full(len(doc_term_keys[-1]), doc_id, dtype=np.uint32))
+            self.manifest["partitions"][partition] = signature
+
+        os.makedirs(self.directory, exist_ok=True)
+        if doc_ids:
+            # Named after the doc range it covers, so names sort in doc order and a merge never reuses one
+            name = f"segment_{first_doc:09d}_{len(self):09d}.npz"
+            self._write_segment(name, _encode(np.concatenate(doc_term_keys), np.concatenate(doc_ids)))
+            self.manifest["segments"].append(name)
+            self.manifest["countries"] = list(country_ids)
+            self.dates = np.concatenate([self.dates, np.array(new_dates, dtype=np.int32)])
+            self.countries = np.concatenate([self.countries, np.array(new_countries, dtype=np.int32)])
+        self._save()
+        self._merge_segments()
+        return len(new_dates)
+
+    def _merge_segments(self):
+        """
+        Merges runs of MERGE_FACTOR adjacent segments of about the same size level until none is
+        left. Segments stay in doc order, since only neighbours are merged.
+        """
+        while True:
+            names = self.manifest["segments"]
+            run = _merge_start([_level(self._segment(name)) for name in names])
+            if run is None:
+                return
+            old_names = names[run:run + MERGE_FACTOR]
+            pairs = [_decode(self._segment(old_name)) for old_name in old_names]
+            name = f"{old_names[0].rsplit('_', 1)[0]}_{old_names[-1].rsplit('_', 1)[1]}"
+            self._write_segment(name, _encode(np.concatenate([term_keys for term_keys, _ in pairs]),
+                                              np.concatenate([doc_ids for _, doc_ids in pairs])))
+            self.manifest["segments"] = names[:run] + [name] + names[run + MERGE_FACTOR:]
+            self._save()
+            for old_name in old_names:
+                os.remove(os.path.join(self.directory, old_name))
+                self.segments.pop(old_name, None)
+
+    # ------------------------------------------
+    # Querying
+    # ------------------------------------------
+    def postings(self, term):
+        """Sorted doc IDs of the descriptions containing `term` (a case-folded term or term pair)."""
+        ids = [self.term_ids.get(part) for part in term.split(" ")]
+        if None in ids or len(ids) > 2:
+            return np.zeros(0, dtype=np.int64)
+        key = ids[0] if len(ids) == 1 else _pair_keys(*ids)
+        found = []
+        for name in self.manifest["segments"]:
+            segment = self._segment(name)
+            position = np.searchsorted(segment["terms"], key)
+            if position < len(segment["terms"]) and segment["terms"][position] == key:
+                first, last = segment["offsets"][position], segment["offsets"][position + 1]
+                found.append(np.cumsum(segment["deltas"][first:last].astype(np.int64)))
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def _phrase(self, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return np.arange(len(self))
+        if len(tokens) == 1:
+            return self.postings(tokens[0])
+        matches = self.postings(f"{tokens[0]} {tokens[1]}")
+        for first, second in zip(tokens[1:], tokens[2:]):
+            matches = np.intersect1d(matches, self.postings(f"{first} {second}"), assume_unique=True)
+        return matches
+
+    def _parse(self, query):
+        """Evaluates a query to sorted doc IDs (recursive descent: OR < AND < NOT < atom)."""
+        tokens = QUERY_PATTERN.findall(query)
+        position = 0
+
+        def peek():
+            return tokens[position] if position < len(tokens) else None
+
+        def take():
+            nonlocal position
+            position += 1
+            return tokens[position - 1]
+
+        def parse_or():
+            matches = parse_and()
+            while peek() == "OR":
+                take()
+                matches = np.union1d(matches, parse_and())
+            return matches
+
+        def parse_and():
+            matches = parse_not()
+            while peek() not in (None, "OR", ")"):
+                if peek() == "AND":
+                    take()
+                matches = np.intersect1d(matches, parse_not(), assume_unique=True)
+            return matches
+
+        def parse_not():
+            if peek() == "NOT" or (peek() or "").startswith("-"):
+                token = take()
+                if token not in ("NOT", "-"):
+                    tokens.insert(position, token[1:])
+                return np.setdiff1d(np.arange(len(self)), parse_not(), assume_unique=True)
+            return parse_atom()
+
+        def parse_atom():
+            token = take() if peek() is not None else ""
+            if token == "(":
+                matches = parse_or()
+                if peek() == ")":
+                    take()
+                return matches
+            return self._phrase(token.strip('"'))
+
+        return parse_or()
+
+    def search(self, query, since=None, until=None, countries=None):
+        """
+        Doc IDs matching `query`, archived between `since` and `until` (inclusive YYYY-MM-DD)
+        in a location containing any of `countries` (case-insensitive).
+        """
+        matches = self._parse(query)
+        keep = np.ones(len(matches), dtype=bool)
+        if since:
+            keep &= self.dates[matches] >= (np.datetime64(since, "D") - EPOCH).astype(int)
+        if until:
+            keep &= self.dates[matches] <= (np.datetime64(until, "D") - EPOCH).astype(int)
+        if countries:
+            wanted = [country.casefold() for country in countries]
+            allowed = np.array([any(country in name.casefold() for country in wanted)
+                                for name in self.manifest["countries"]], dtype=bool)
+            keep &= allowed[self.countries[matches]]
+        return matches[keep]
+
+    def describe(self, doc_ids):
+        """(link, date, country) rows of the given doc IDs."""
+        return [
+            (self.manifest["links"][doc_id], str(EPOCH + int(self.dates[doc_id])),
+             self.manifest["countries"][self.countries[doc_id]])
+            for doc_id in doc_ids
+        ]
+
+
+# ==========================================
+# --- INDEX UPDATE / AD-HOC QUERIES ---
+# ==========================================
+if __name__ == "__main__":
+    import argparse
+
+    # Usage: python text_index.py update      (a workflow step after the scrape and its sheet writes)
+    #        python text_index.py '"data engineer" AND (kubernetes OR terraform) -intern' --since 2026-01-01 --country France
+    parser = argparse.ArgumentParser(description="Full-text index over the archived job descriptions.")
+    parser.add_argument("query", help="'update' to index new archive partitions, or a query")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--country", action="append")
+    parser.add_argument("--show", type=int, default=10, help="Number of matching postings to list")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = TextIndex()
+    if args.query == "update":
+        added = index.update()
+        print(f"🔎 {added} new descriptions indexed in {time.perf_counter() - start:.2f}s "
+              f"({len(index)} in total, {len(index.manifest['segments'])} segments).")
+    else:
+        matches = index.search(args.query, args.since, args.until, args.country)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{len(matches)} of {len(index)} postings match {args.query!r} ({elapsed_ms:.1f} ms).")
+        for link, date, country in index.describe(matches[-args.show:][::-1]):
+            print(f"  {date}  {country:<30}  {link}")